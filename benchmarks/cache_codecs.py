@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# Size and load time of the English models in tomb.cache, with each codec and compression.
+#
+# Usage: python3 benchmarks/cache_codecs.py [runs]
+
+import os
+import sys
+import time
+
+from tomb import cache
+from tomb.language import tables
+
+NAME = f"benchmark-codecs-{os.getpid()}"
+
+CASES = [
+    ("language model", lambda: tables.english, ["pickle", "pickle5"]),
+    ("quadgram logp", lambda: tables.english_quadgrams.logp, ["pickle", "pickle5", "array", "npy"]),
+]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'object':16} {'codec':8} {'compression':12} {'size':>10} {'load':>10}")
+    try:
+        for label, get, codecs in CASES:
+            obj = get()
+            for codec in codecs:
+                for compression in (None, "zlib", "lzma"):
+                    try:
+                        cache.store(NAME, obj, codec, compression)
+                    except cache.CacheError as err:
+                        print(f"{label:16} {codec:8} {str(compression):12} unavailable ({err.__cause__!r})")
+                        continue
+                    size = os.path.getsize(cache.cache_file_path(NAME))
+                    times = []
+                    for _ in range(0, runs):
+                        start = time.perf_counter()
+                        cache.load(NAME)
+                        times.append(time.perf_counter() - start)
+                    print(f"{label:16} {codec:8} {str(compression):12} {size >> 10:7} KiB {min(times) * 1000:7.2f} ms")
+    finally:
+        cache.invalidate(NAME)
+
+
+if __name__ == "__main__":
+    main()
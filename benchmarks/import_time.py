@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# Time `import tomb.analysis` in a fresh interpreter, with and without loading the language models.
+#
+# Models are loaded lazily, so plain imports (e.g. scripts that only use the xor helpers) should not pay
+#  for unpickling (or, on a cold cache, generating) them.
+#
+# Usage: python3 benchmarks/import_time.py [runs]
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "python startup": "pass",
+    "import tomb": "import tomb",
+    "import tomb.analysis": "import tomb.analysis",
+    "import + preload()": "import tomb.analysis; tomb.analysis.tables.preload()",
+}
+
+
+def time_snippet(code: str, runs: int) -> list[float]:
+    times = []
+    for _ in range(0, runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    # Make sure the cache is warm, so we're timing loading, not generating.
+    time_snippet(CASES["import + preload()"], 1)
+
+    for name, code in CASES.items():
+        times = time_snippet(code, runs)
+        print(f"{name:24} min {min(times) * 1000:7.1f} ms   median {statistics.median(times) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# Score drift, size and speed of pruned English models, against the full model (see tomb.analysis.pruning_drift).
+#
+# Samples are windows of the bundled corpus, plus the same windows XOR'd with a single byte (the kind of
+#  garbage englishness() has to reject), so rankings cover both ends of the scale.
+#
+# Usage: python3 benchmarks/pruning.py [samples]
+
+import random
+import sys
+
+from tomb import xorc
+from tomb.analysis import pruning_drift
+from tomb.language import prune_model, tables
+
+SETTINGS = [
+    {"top_n": {"word": 20000}},
+    {"top_n": {"word": 5000}},
+    {"top_n": {"word": 1000}},
+    {"cumulative": 0.99},
+    {"cumulative": 0.95},
+    {"top_n": 1000, "cumulative": 0.99},
+]
+
+
+def samples(n: int) -> list[str]:
+    rng = random.Random(1)
+    text = " ".join(tables.corpus_texts("english"))
+    out = []
+    for _ in range(0, n // 2):
+        i = rng.randrange(0, len(text) - 200)
+        window = text[i:i+200]
+        out.append(window)
+        out.append(xorc(window.encode(), rng.randrange(1, 256)).decode("latin-1"))
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    texts = samples(n)
+    full = tables.english
+    print(f"{'setting':40} {'mean drift':>10} {'max drift':>10} {'order':>7} {'size':>16} {'time':>14}")
+    for setting in SETTINGS:
+        r = pruning_drift(full, prune_model(full, **setting), texts)
+        print(
+            f"{str(setting):40} {r.mean_drift:10.5f} {r.max_drift:10.5f} {r.order_agreement:7.2%} "
+            f"{r.full_nbytes >> 10:6} → {r.pruned_nbytes >> 10:5} KiB {r.full_seconds:5.2f} → {r.pruned_seconds:5.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
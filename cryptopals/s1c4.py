@@ -2,10 +2,10 @@
 
 # Set 1, Challenge 4: Find XOR'd message in noise.
 
-from binascii import hexlify, unhexlify
+from binascii import hexlify
 
 from tomb import xorc
-from tomb.analysis import englishness
+from tomb.analysis import detect_single_byte_xor
 
 
 data = """\
@@ -338,23 +338,10 @@ e03555453d1e31775f37331823164c341c09e310463438481019fb0b12fa
 32042f46431d2c44607934ed180c1028136a5f2b26092e3b2c4e2930585a
 """
 
-scores = {}
-for k in range(0, 256):
-    for ln, line in enumerate(data.split("\n"), 1):
-        if line == "":
-            continue
-        ct = unhexlify(line.encode())
-        pt = xorc(ct, k)
-        try:
-            pt = pt.decode()
-            sc = englishness(pt)
-            scores[(k, ln, ct)] = sc
-        except ValueError:
-            pass
-
-k, ln, ct = sorted(scores.items(), key=lambda p: p[1], reverse=True)[0][0]
-print("key is likely: " + str(k) + ",", "cyphertext is likely line " + str(ln) + ": " + hexlify(ct).decode())
-print(xorc(ct, k).decode())
-
-
+# The detector uses a process pool, so guard against re-running this script in spawned workers.
+if __name__ == "__main__":
+    top = detect_single_byte_xor(data.splitlines())
 
+    ln, k, ct = top.best()
+    print("key is likely: " + str(k) + ",", "cyphertext is likely line " + str(ln) + ": " + hexlify(ct).decode())
+    print(xorc(ct, k).decode())
@@ -6,7 +6,7 @@ from binascii import a2b_base64
 from collections.abc import Iterator
 
 from tomb import transplit, xorc, xor
-from tomb.analysis import englishness, guess_vignere_key_length
+from tomb.analysis import TopK, englishness_batch, englishness_bytes, guess_vignere_key_length
 
 ct = a2b_base64("""\
 HUIfTQsPAh9PE048GmllH0kcDk4TAQsHThsBFkU2AB4BSWQgVB0dQzNTTmVS
@@ -77,18 +77,11 @@ Jk8DCkkcC3hFMQIEC0EbAVIqCFZBO1IdBgZUVA4QTgUWSR4QJwwRTWM=
 
 
 def crack_single_byte_xor(ct):
-    scores = {}
-    for k in range(0, 256):
-        pt = xorc(ct, k)
-        try:
-            pt = pt.decode()
-            sc = englishness(pt)
-            scores[k] = sc
-        except ValueError:
-            pass
+    top = TopK()
+    for k, sc in enumerate(englishness_batch(xorc(ct, k) for k in range(0, 256))):
+        top.push(sc, k)
 
-    k = sorted(scores.items(), key=lambda p: p[1], reverse=True)[0][0]
-    return k
+    return top.best()
 
 
 score_threshold = 0.1
@@ -100,11 +93,7 @@ for l in guess_vignere_key_length(ct):
         key[idx] = crack_single_byte_xor(transposed_blocks[idx])
 
     pt = xor(ct, key)
-    try:
-        pt = pt.decode()
-        if englishness(pt) > score_threshold:
-            print("key is likely:", bytes(key))
-            print(pt)
-            break
-    except ValueError:
-        pass
+    if englishness_bytes(pt) > score_threshold:
+        print("key is likely:", bytes(key))
+        print(pt.decode(errors="replace"))
+        break
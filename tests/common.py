@@ -1,4 +1,25 @@
 import sys
 import os
+import tempfile
+from unittest import mock
 
 sys.path.append(os.getcwd())
+
+
+def use_temp_cache(test):
+    """
+    Point tomb.cache at a temporary directory for the duration of a test (call from setUp),
+     or of a whole test case (call from setUpClass, with the class), so tests never read or leave
+     entries in the user's cache.
+    """
+    from tomb import cache
+    add_cleanup = test.addClassCleanup if isinstance(test, type) else test.addCleanup
+    tmp = tempfile.TemporaryDirectory()
+    add_cleanup(tmp.cleanup)
+    patch = mock.patch.object(cache, "TOMB_CACHE_DIR", tmp.name)
+    patch.start()
+    add_cleanup(patch.stop)
+    # Entries in the memory tier would otherwise outlive the directory.
+    add_cleanup(cache.memory.clear)
+    cache.memory.clear()
+    return tmp.name
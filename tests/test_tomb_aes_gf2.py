@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import random
+import unittest
+from array import array
+
+import common
+
+from tomb.aes.core import mix_columns
+from tomb.aes.gf2 import *
+
+
+class TestGF2(unittest.TestCase):
+
+    def test_mul_matches_bitwise(self):
+        for a in range(0, 256):
+            for b in range(0, 256):
+                self.assertEqual(gf2_8_mul(a, b), gf2_8_mul_bitwise(a, b))
+
+    def test_log_tables(self):
+        # 3 generates every non-zero element.
+        self.assertEqual(sorted(GF2_8_EXP[0:255]), list(range(1, 256)))
+        for a in range(1, 256):
+            self.assertEqual(GF2_8_EXP[GF2_8_LOG[a]], a)
+
+    def test_inv(self):
+        self.assertEqual(gf2_8_inv(1), 1)
+        # From FIPS-197, section 4.4.
+        self.assertEqual(gf2_8_inv(0x53), 0xca)
+        for a in range(1, 256):
+            self.assertEqual(gf2_8_mul(a, gf2_8_inv(a)), 1)
+        with self.assertRaises(ZeroDivisionError):
+            gf2_8_inv(0)
+
+    def test_div(self):
+        for a in range(0, 256):
+            for b in range(1, 256):
+                self.assertEqual(gf2_8_mul(gf2_8_div(a, b), b), a)
+        with self.assertRaises(ZeroDivisionError):
+            gf2_8_div(1, 0)
+
+    def test_pow(self):
+        for a in (0, 1, 2, 3, 0x53, 0xff):
+            x = 1
+            for n in range(0, 300):
+                self.assertEqual(gf2_8_pow(a, n), x)
+                x = gf2_8_mul_bitwise(x, a)
+        self.assertEqual(gf2_8_pow(0x53, -1), gf2_8_inv(0x53))
+        self.assertEqual(gf2_8_pow(0x53, -2), gf2_8_inv(gf2_8_mul(0x53, 0x53)))
+        with self.assertRaises(ZeroDivisionError):
+            gf2_8_pow(0, -1)
+
+    def test_mul_table(self):
+        table = gf2_8_mul_table()
+        self.assertEqual(len(table), 256)
+        for a in (0, 1, 2, 9, 0xfe):
+            self.assertEqual(list(table[a]), [gf2_8_mul_bitwise(a, b) for b in range(0, 256)])
+
+    def test_bytes_ops(self):
+        rng = random.Random(0)
+        data = bytes(rng.randrange(256) for _ in range(0, 1000))
+        other = bytes(rng.randrange(256) for _ in range(0, 1000))
+        self.assertEqual(gf2_8_mul_bytes(data, 0x1d), bytes(gf2_8_mul(b, 0x1d) for b in data))
+        self.assertEqual(gf2_8_add_bytes(data, other), bytes(a ^ b for a, b in zip(data, other)))
+        self.assertEqual(gf2_8_inv_bytes(b"\0\1\x53"), b"\0\1\xca")
+        with self.assertRaises(ValueError):
+            gf2_8_add_bytes(data, other[1:])
+
+    def test_matrix_apply_mix_columns(self):
+        rng = random.Random(1)
+        states = [array("B", (rng.randrange(256) for _ in range(0, 16))) for _ in range(0, 10)]
+        # Row r of the data is byte r of every column of every state.
+        rows = [bytes(s[c + r] for s in states for c in range(0, 16, 4)) for r in range(0, 4)]
+        matrix = [[2, 3, 1, 1], [1, 2, 3, 1], [1, 1, 2, 3], [3, 1, 1, 2]]
+        out = gf2_8_matrix_apply(matrix, rows)
+        for s in states:
+            mix_columns(s)
+        self.assertEqual(out, [bytes(s[c + r] for s in states for c in range(0, 16, 4)) for r in range(0, 4)])
+
+    def test_matrix_apply_errors(self):
+        with self.assertRaises(ValueError):
+            gf2_8_matrix_apply([[1, 2], [3]], [b"a", b"b"])
+        with self.assertRaises(ValueError):
+            gf2_8_matrix_apply([[1, 2]], [b"a"])
+        with self.assertRaises(ValueError):
+            gf2_8_matrix_apply([[1, 2]], [b"a", b"bc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from array import array
+from unittest import mock
+
+import common
+
+from tomb import cache
+from tomb.aes import tables
+from tomb.aes.core import inv_mix_columns, inv_shift_rows, inv_sub_bytes, mix_columns, shift_rows, sub_bytes
+
+
+def random_state(rng):
+    return array("B", (rng.randrange(256) for _ in range(0, 16)))
+
+
+def column_word(state, c):
+    return int.from_bytes(bytes(state[4 * c:4 * c + 4]), "big")
+
+
+class TestAESTables(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patch = mock.patch.object(cache, "TOMB_CACHE_DIR", self.tmp.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        for name in ("TE", "TD"):
+            cache.memory.invalidate(f"aes-{name.lower()}-v{tables.TABLES_FORMAT}")
+            vars(tables).pop(name, None)
+
+    def test_verify_constants(self):
+        self.assertEqual(tables.verify(), [])
+
+    def test_s_box(self):
+        # From FIPS-197, section 5.1.1.
+        self.assertEqual(tables.S_BOX[0x53], 0xed)
+        self.assertEqual(tables.INV_S_BOX[0xed], 0x53)
+
+    def test_te_is_a_round(self):
+        rng = random.Random(0)
+        te = tables.TE
+        for _ in range(0, 20):
+            state = random_state(rng)
+            exp = array("B", state)
+            sub_bytes(exp)
+            shift_rows(exp)
+            mix_columns(exp)
+            for c in range(0, 4):
+                word = 0
+                for r in range(0, 4):
+                    word ^= te[r][state[r + 4 * ((c + r) % 4)]]
+                self.assertEqual(word, column_word(exp, c))
+
+    def test_td_is_an_inverse_round(self):
+        rng = random.Random(1)
+        td = tables.TD
+        for _ in range(0, 20):
+            state = random_state(rng)
+            exp = array("B", state)
+            inv_shift_rows(exp)
+            inv_sub_bytes(exp)
+            inv_mix_columns(exp)
+            for c in range(0, 4):
+                word = 0
+                for r in range(0, 4):
+                    word ^= td[r][state[r + 4 * ((c - r) % 4)]]
+                self.assertEqual(word, column_word(exp, c))
+
+    def test_t_tables_are_cached(self):
+        name = f"aes-te-v{tables.TABLES_FORMAT}"
+        self.assertFalse(cache.exists(name))
+        te = tables.TE
+        self.assertTrue(cache.exists(name))
+
+        cache.memory.invalidate(name)
+        disk = cache.counters["disk"]
+        self.assertEqual(tables.load_te(), te)
+        self.assertEqual(cache.counters["disk"], disk + 1)
+
+    def test_import_is_lazy(self):
+        code = "import tomb.aes.tables as t, sys; print(sorted(set(t._tables) & set(vars(t))))"
+        out = subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(),
+                             capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
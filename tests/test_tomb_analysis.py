@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from binascii import hexlify, unhexlify
+
+import common
+
+from tomb import xorc
+from tomb.analysis import *
+from tomb.language import prune_model
+
+
+S1C3_CT = unhexlify(b"1b37373331363f78151b7f2b783431333d78397828372d363c78373e783a393b3736")
+
+# A few lines from the Set 1, Challenge 4 data, including the encrypted one.
+S1C4_CTS = [unhexlify(line) for line in (
+    b"0e3647e8592d35514a081243582536ed3de6734059001e3f535ce6271032",
+    b"334b041de124f73c18011a50e608097ac308ecee501337ec3e100854201d",
+    b"40e127f51c10031d0133590b1e490f3514e05a54143d08222c2a4071e351",
+    b"7b5a4215415d544115415d5015455447414c155c46155f4058455c5b523f",
+    b"0864eb4935144c501103a71851370719301bec57093a0929ea3f18060e55",
+    b"2d395e57143359e80efffb13330633ea19e323077b4814571e5a3de73a1f",
+)]
+
+
+def best(scores):
+    return max((sc, idx) for idx, sc in enumerate(scores) if sc is not None)[1]
+
+
+class TestEnglishness(unittest.TestCase):
+
+    def test_batch_matches_englishness(self):
+        candidates = []
+        for k in range(0, 256):
+            try:
+                candidates.append(xorc(S1C3_CT, k).decode())
+            except ValueError:
+                pass
+        scores = englishness_batch(candidates)
+        self.assertEqual(len(scores), len(candidates))
+        for sc, text in zip(scores, candidates):
+            self.assertAlmostEqual(sc, englishness(text), places=12, msg=text)
+
+    def test_batch_bytes_uses_byte_model(self):
+        pt = b"Cooking MC's like a pound of bacon"
+        scores = englishness_batch([pt, pt.decode()])
+        self.assertEqual(scores[0], englishness_bytes(pt))
+        self.assertAlmostEqual(scores[1], englishness(pt.decode()), places=12)
+
+    def test_bytes_scoring_tolerates_invalid_utf8(self):
+        pt = b"Cooking MC's like a pound of bacon"
+        self.assertGreater(englishness_bytes(pt + b"\xff"), 0.3)
+        scores = englishness_batch(xorc(S1C3_CT, k) for k in range(0, 256))
+        self.assertEqual(max(range(0, 256), key=scores.__getitem__), 88)
+
+    def test_batch_empty(self):
+        self.assertEqual(englishness_batch([]), [])
+        self.assertEqual(englishness_batch([""]), [0.0])
+
+
+class TestScoreAllLanguages(unittest.TestCase):
+
+    def test_matches_englishness(self):
+        pt = "Cooking MC's like a pound of bacon"
+        self.assertEqual(list(score_all_languages(pt)), available_languages())
+        self.assertAlmostEqual(score_all_languages(pt)["english"], englishness(pt), places=12)
+        self.assertEqual(score_all_languages(pt.encode(), ["english"]), {"english": englishness_bytes(pt.encode())})
+        self.assertIn(("english", True), language_models)
+
+
+class TestPruningDrift(unittest.TestCase):
+
+    def test_drift(self):
+        samples = ["Cooking MC's like a pound of bacon", "the of and to in", "zzzzqx vlkq"]
+        full = tables.english
+        same = pruning_drift(full, full, samples)
+        self.assertEqual((same.samples, same.max_drift, same.order_agreement), (3, 0.0, 1.0))
+        pruned = pruning_drift(full, prune_model(full, top_n=100), samples)
+        self.assertGreater(pruned.max_drift, 0.0)
+        self.assertLess(pruned.pruned_nbytes, pruned.full_nbytes)
+
+
+class TestScoringCascade(unittest.TestCase):
+
+    def test_byte_class_ratios(self):
+        self.assertEqual(byte_class_ratios(b"ab c\x00"), (0.8, 0.8))
+        self.assertEqual(byte_class_ratios(b"1234"), (1.0, 0.0))
+        self.assertEqual(byte_class_ratios(b""), (0.0, 0.0))
+
+    def test_matches_exhaustive_s1c3(self):
+        candidates = [xorc(S1C3_CT, k) for k in range(0, 256)]
+        cascade = ScoringCascade()
+        self.assertEqual(best(cascade.score(candidates)), best(englishness_batch(candidates)))
+        self.assertEqual(best(cascade.score(candidates)), 88)
+
+    def test_matches_exhaustive_s1c4(self):
+        candidates = [xorc(ct, k) for k in range(0, 256) for ct in S1C4_CTS]
+        cascade = ScoringCascade()
+        top = best(cascade.score(candidates))
+        self.assertEqual(top, best(englishness_batch(candidates)))
+        self.assertEqual(candidates[top], b"Now that the party is jumping\n")
+
+    def test_stage_counts(self):
+        cascade = ScoringCascade()
+        scores = cascade.score(xorc(S1C3_CT, k) for k in range(0, 256))
+        passed = cascade.passed
+        self.assertEqual(passed["input"], 256)
+        self.assertTrue(passed["input"] >= passed["bytes"] >= passed["char"] >= passed["full"] >= 1)
+        self.assertEqual(passed["full"], sum(sc is not None for sc in scores))
+        cascade.reset()
+        self.assertEqual(cascade.passed["input"], 0)
+
+
+class TestTopK(unittest.TestCase):
+
+    def test_keeps_k_best(self):
+        top = TopK(3)
+        top.extend((sc, f"item{sc}") for sc in [5, 1, 9, 3, 7, 2])
+        self.assertEqual(len(top), 3)
+        self.assertEqual(top.results(), [(9, "item9"), (7, "item7"), (5, "item5")])
+        self.assertEqual(top.best(), "item9")
+        self.assertEqual(top.admission(), 5)
+
+    def test_stable_ties(self):
+        top = TopK(2)
+        for item in "abcd":
+            top.push(1.0, item)
+        self.assertEqual(top.results(), [(1.0, "a"), (1.0, "b")])
+
+    def test_threshold(self):
+        top = TopK(5, threshold=0.5)
+        self.assertFalse(top.push(0.4, "low"))
+        self.assertTrue(top.push(0.6, "high"))
+        self.assertEqual(top.admission(), 0.5)
+        self.assertEqual(top.results(), [(0.6, "high")])
+
+    def test_merge_matches_single_collector(self):
+        scores = [(i * 7919) % 101 / 10 for i in range(0, 1000)]
+        whole = TopK(10)
+        for order, sc in enumerate(scores):
+            whole.push(sc, order, order)
+        parts = [TopK(10) for _ in range(0, 4)]
+        for order, sc in enumerate(scores):
+            parts[order % 4].push(sc, order, order)
+        merged = TopK(10)
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(merged.results(), whole.results())
+
+    def test_merge_unorderable_items(self):
+        # Both collectors number their pushes from 0, so these tie on score and order.
+        a, b = TopK(2), TopK(2)
+        a.push(1.0, {"x": 1})
+        b.push(1.0, {"y": 2})
+        a.merge(b)
+        self.assertEqual(sorted(len(item) for _, item in a.results()), [1, 1])
+        self.assertEqual(len(a), 2)
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            TopK().best()
+        with self.assertRaises(ValueError):
+            TopK(0)
+
+
+class TestSingleByteXorDetector(unittest.TestCase):
+
+    def test_scan(self):
+        top, passed = scan_single_byte_xor(enumerate(S1C4_CTS, 1), k=2)
+        self.assertEqual(top.best(), (4, 53, S1C4_CTS[3]))
+        self.assertEqual(passed["input"], 256 * len(S1C4_CTS))
+
+    def test_detect_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lines.hex")
+            with open(path, "wb") as f:
+                f.write(b"not hex\n\n")
+                for ct in S1C4_CTS * 20:
+                    f.write(hexlify(ct) + b"\n")
+            top = detect_single_byte_xor(path, k=3, processes=2, chunk_lines=7)
+            results = top.results()
+            self.assertEqual(len(results), 3)
+            # The same line repeats every 6 lines, the earliest copies win ties.
+            self.assertEqual([item for _, item in results], [(ln, 53, S1C4_CTS[3]) for ln in (6, 12, 18)])
+
+    def test_detect_iterable(self):
+        top = detect_single_byte_xor([hexlify(ct).decode() for ct in S1C4_CTS], processes=1)
+        self.assertEqual(top.best(), (4, 53, S1C4_CTS[3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import multiprocessing
+import os
+import pickle
+import time
+import unittest
+from array import array
+from contextlib import redirect_stdout
+from functools import partial
+from io import StringIO
+from unittest import mock
+
+import common
+
+from tomb import cache
+
+
+def _slow_factory(log_path):
+    with open(log_path, "a") as f:
+        f.write("computed\n")
+    time.sleep(0.2)
+    return "result"
+
+
+def _get_or_compute(name, log_path, cache_dir):
+    # The test's patch of the cache directory isn't inherited by spawned processes.
+    cache.TOMB_CACHE_DIR = cache_dir
+    cache.get_or_compute(name, partial(_slow_factory, log_path))
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        common.use_temp_cache(self)
+        self.stem = f"test-entry-{os.getpid()}"
+
+    def test_pickle_round_trip(self):
+        cache.pickle(self.stem, {"a": [1, 2]})
+        self.assertTrue(cache.exists(self.stem))
+        self.assertEqual(cache.unpickle(self.stem), {"a": [1, 2]})
+
+    def test_unpickle_missing(self):
+        with self.assertRaises(cache.CacheError):
+            cache.unpickle(self.stem)
+
+    def test_prune(self):
+        names = [self.stem, f"{self.stem}-aaaa", f"{self.stem}-bbbb", f"{self.stem}x-cccc"]
+        for name in names:
+            cache.pickle(name, name)
+        self.assertEqual(cache.prune(self.stem, keep=names[2]), names[0:2])
+        self.assertEqual(cache.entries(self.stem), names[2:])
+
+    def test_get_or_compute(self):
+        calls = []
+        factory = lambda: calls.append(1) or [1, 2, 3]
+        obj = cache.get_or_compute(self.stem, factory)
+        self.assertIs(cache.get_or_compute(self.stem, factory), obj)
+        cache.memory.invalidate(self.stem)
+        self.assertEqual(cache.get_or_compute(self.stem, factory), obj)
+        self.assertEqual(len(calls), 1)
+        cache.pickle(self.stem, "new")
+        self.assertEqual(cache.get_or_compute(self.stem, factory), "new")
+        cache.invalidate(self.stem)
+        self.assertNotIn(self.stem, cache.memory)
+
+    def test_atomic_write(self):
+        cache.pickle(self.stem, "old")
+        with self.assertRaises(cache.CacheError):
+            cache.pickle(self.stem, lambda: None)
+        # A failed write leaves the old entry, and no temporary files, behind.
+        self.assertEqual(cache.unpickle(self.stem), "old")
+        self.assertEqual([name for name in os.listdir(cache.TOMB_CACHE_DIR) if name.startswith(f".{self.stem}.")], [])
+
+    def test_single_flight(self):
+        log_path = cache.cache_file_path(f"{self.stem}-log")
+        args = (self.stem, log_path, cache.TOMB_CACHE_DIR)
+        procs = [multiprocessing.Process(target=_get_or_compute, args=args) for _ in range(0, 4)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        with open(log_path) as f:
+            self.assertEqual(f.read(), "computed\n")
+        self.assertEqual(cache.unpickle(self.stem), "result")
+
+    def test_codecs(self):
+        obj = {"counts": array("I", range(0, 1000)), "buf": bytearray(b"xyz" * 100), "words": ["a", "b"]}
+        for codec in ("pickle", "pickle5"):
+            for compression in (None, "zlib", "lzma"):
+                cache.store(self.stem, obj, codec, compression)
+                self.assertEqual(cache.load(self.stem), obj)
+        cache.store(self.stem, obj["counts"], "array", "zlib")
+        self.assertEqual(cache.load(self.stem), obj["counts"])
+        with self.assertRaises(cache.CacheError):
+            cache.store(self.stem, obj, "array")
+        with self.assertRaises(cache.CacheError):
+            cache.store(self.stem, obj, "bzip3")
+
+    def test_legacy_pickle(self):
+        with open(cache.cache_file_path(self.stem), "wb") as f:
+            pickle.dump([1, 2], f)
+        self.assertEqual(cache.load(self.stem), [1, 2])
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_lru_entries(self):
+        mc = cache.MemoryCache(max_entries=2)
+        mc.put("a", 1)
+        mc.put("b", 2)
+        self.assertEqual(mc.get("a"), 1)
+        mc.put("c", 3)
+        self.assertEqual(list(mc.entries), ["a", "c"])
+        self.assertIsNone(mc.get("b"))
+        self.assertEqual((mc.hits, mc.misses, mc.evictions), (1, 1, 1))
+
+    def test_lru_bytes(self):
+        mc = cache.MemoryCache(max_bytes=1500)
+        mc.put("a", bytes(1000))
+        mc.put("b", bytes(1000))
+        self.assertEqual(list(mc.entries), ["b"])
+        mc.put("c", bytes(5000))
+        self.assertEqual(list(mc.entries), ["c"])
+        self.assertEqual(mc.nbytes, cache.approx_size(bytes(5000)))
+
+    def test_ttl(self):
+        mc = cache.MemoryCache(ttl=0.0)
+        mc.put("a", 1)
+        self.assertIsNone(mc.get("a"))
+        self.assertEqual((mc.expirations, len(mc)), (1, 0))
+
+
+class TestQuota(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = common.use_temp_cache(self)
+        patch = mock.patch.object(cache, "quota", None)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def store_aged(self, name, size, age):
+        cache.store(name, bytes(size), "pickle")
+        self.age(name, age)
+
+    def age(self, name, age):
+        t = time.time() - age
+        os.utime(cache.cache_file_path(name), (t, t))
+
+    def test_quota(self):
+        self.store_aged("a", 1000, 30)
+        self.store_aged("b", 1000, 20)
+        self.store_aged("c", 1000, 10)
+        cache.touch("a")
+        cache.set_quota(2500)
+        self.assertEqual(cache.entries(), ["a", "c"])
+        # The entry just written is never evicted, even if it's the oldest (or too big on its own).
+        cache.store("d", bytes(3000), "pickle")
+        self.assertEqual(cache.entries(), ["d"])
+
+    def test_reads_keep_entries(self):
+        self.store_aged("hot", 1000, 30)
+        self.store_aged("loaded", 1000, 25)
+        self.store_aged("cold", 1000, 20)
+        self.assertEqual(cache.get_or_compute("hot", list), bytes(1000))
+        self.age("hot", 30)
+        cache.load("loaded")
+        # Served from memory, but recently used all the same (if not touched in the last TOUCH_INTERVAL).
+        cache._touched.pop("hot")
+        hits = cache.counters["memory"]
+        self.assertEqual(cache.get_or_compute("hot", list), bytes(1000))
+        self.assertEqual(cache.counters["memory"], hits + 1)
+        cache.set_quota(2500)
+        self.assertEqual(cache.entries(), ["hot", "loaded"])
+
+    def test_no_lock_file_left(self):
+        cache.get_or_compute("computed", lambda: "value")
+        self.assertEqual(os.listdir(cache.TOMB_CACHE_DIR), ["computed"])
+
+    def test_stats_and_cli(self):
+        cache.store("a", bytes(100))
+        cache.load("a")
+        st = cache.stats()
+        self.assertEqual((st["directory"], st["entries"]), (self.dir, 1))
+        self.assertGreater(st["bytes"], 100)
+        self.assertGreater(st["average_load_seconds"], 0.0)
+        out = StringIO()
+        with redirect_stdout(out):
+            cache.main(["list"])
+            cache.main(["prune", "--max-entries", "0"])
+        self.assertIn(" a\n", out.getvalue())
+        self.assertIn("evicted a", out.getvalue())
+        self.assertEqual(cache.entries(), [])
+
+
+class TestMemoize(unittest.TestCase):
+
+    def setUp(self):
+        common.use_temp_cache(self)
+        self.namespace = f"test{os.getpid()}"
+        self.calls = []
+
+    def memoized(self, **options):
+        @cache.memoize(self.namespace, **options)
+        def f(a, b=b""):
+            self.calls.append((a, b))
+            return [a, b]
+        return f
+
+    def test_memoize(self):
+        f = self.memoized()
+        self.assertEqual(f(("x", 1), b=b"y"), [("x", 1), b"y"])
+        self.assertEqual(f(("x", 1), b=b"y"), [("x", 1), b"y"])
+        self.assertEqual(f(("x", 2), b=b"y"), [("x", 2), b"y"])
+        self.assertEqual(len(self.calls), 2)
+        # Survives the in-memory tier going away (e.g. a restart).
+        cache.memory.clear()
+        self.assertEqual(self.memoized()(("x", 1), b=b"y"), [("x", 1), b"y"])
+        self.assertEqual(len(self.calls), 2)
+        f.invalidate(("x", 1), b=b"y")
+        f(("x", 1), b=b"y")
+        self.assertEqual(len(self.calls), 3)
+        with self.assertRaises(TypeError):
+            f(object())
+
+    def test_args_key(self):
+        self.assertEqual(cache.args_key((1, "a", b"a"), {}), cache.args_key((1, "a", b"a"), {}))
+        keys = {cache.args_key(args, {}) for args in [(1,), ("1",), (b"1",), ((1,),), ([1],), (True,), (1.0,), ("a", "b"), ("ab",)]}
+        self.assertEqual(len(keys), 9)
+
+    def test_versions(self):
+        self.memoized(version=1)(1)
+        self.memoized(version=2)(1)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual([name.split("-")[2] for name in cache.entries(f"memo-{self.namespace}-")], ["v2"])
+
+    def test_max_entries(self):
+        f = self.memoized(max_entries=2)
+        for i in range(0, 4):
+            f(i)
+            # Entries are ordered by modification time, make sure they differ.
+            time.sleep(0.02)
+        self.assertEqual(cache.entries(f"memo-{self.namespace}-"), sorted(f.cache_name(i) for i in (2, 3)))
+        f.clear()
+        self.assertEqual(cache.entries(f"memo-{self.namespace}-"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
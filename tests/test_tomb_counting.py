@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+import random
+import unittest
+from collections import Counter
+
+import common
+
+from tomb.counting import *
+
+
+class TestCounting(unittest.TestCase):
+
+    def test_count_ngrams_str(self):
+        self.assertEqual(count_ngrams("abc-abd", 2), Counter({"ab": 2, "bc": 1, "bd": 1}))
+
+    def test_count_ngrams_bytes(self):
+        exp = Counter({b"ab": 2, b"bc": 1, b"bd": 1})
+        self.assertEqual(count_ngrams(b"abc-abd", 2, alphabet=b"abcd"), exp)
+        self.assertEqual(count_ngrams(bytearray(b"abc-abd"), 2, alphabet=bytearray(b"abcd")), exp)
+
+    def test_count_ngrams_matches_iterator_path(self):
+        rng = random.Random(0)
+        for alphabet in ("abc", "a-]^\\", "xyz ."):
+            for _ in range(0, 50):
+                text = "".join(rng.choice("abc-]^\\xyz .q") for _ in range(0, 30))
+                for n in (1, 2, 3, 5):
+                    # A generator forces the character-at-a-time path.
+                    exp = count_ngrams((c for c in text), n, alphabet=alphabet)
+                    self.assertEqual(count_ngrams(text, n, alphabet=alphabet), exp)
+                    exp = Counter({k.encode(): v for k, v in exp.items()})
+                    data = text.encode()
+                    self.assertEqual(count_ngrams(data, n, alphabet=alphabet.encode()), exp)
+                    self.assertEqual(count_ngrams(bytearray(data), n, alphabet=bytearray(alphabet.encode())), exp)
+
+    def test_count_ngrams_accumulates(self):
+        tab = count_ngrams("abcd", 3)
+        count_ngrams("bcd", 3, tab)
+        self.assertEqual(tab, Counter({"abc": 1, "bcd": 2}))
+        with self.assertRaises(ValueError):
+            count_ngrams("abc", 0)
+
+    def test_word_freq_bytes(self):
+        self.assertEqual(
+            word_freq(b"the -cat, the hat", alphabet=b"acehtx-", scrub=lambda w: w.lstrip(b"-")),
+            Counter({b"the": 2, b"cat": 1, b"hat": 1})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
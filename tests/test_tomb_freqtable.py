@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import math
+import pickle
+import unittest
+from collections import Counter
+
+import common
+
+from tomb.counting import count_ngrams, normalize, word_freq
+from tomb.freqtable import *
+from tomb.functions import bhattacharyya_coefficient_batch
+
+
+TEXT = "the quick brown fox jumps over the lazy dog, then the fox naps"
+
+
+class TestDenseTable(unittest.TestCase):
+
+    def setUp(self):
+        self.counts = count_ngrams(TEXT, 2)
+        self.tab = DenseTable.from_counts(self.counts, "abcdefghijklmnopqrstuvwxyz", 2)
+
+    def test_matches_counter(self):
+        self.assertEqual(self.tab, self.counts)
+        self.assertEqual(len(self.tab), len(self.counts))
+        self.assertEqual(self.tab["th"], self.counts["th"])
+        self.assertEqual(self.tab.get("zz", 0), 0)
+        self.assertNotIn("zz", self.tab)
+        self.assertNotIn("t", self.tab)
+        self.assertNotIn(1, self.tab)
+        self.assertEqual(self.tab.total(), sum(self.counts.values()))
+        self.assertEqual([n for _, n in self.tab.most_common(3)], [n for _, n in self.counts.most_common(3)])
+
+    def test_normalize(self):
+        norm = self.tab.normalize()
+        self.assertEqual(dict(norm.items()), normalize(self.counts))
+        with self.assertRaises(TypeError):
+            norm["th"] = 1
+
+    def test_normalize_is_a_snapshot(self):
+        tab = DenseTable("ab", 1)
+        tab["a"] = tab["b"] = 1
+        norm = tab.normalize()
+        norm.roots()
+        tab["a"] = 8
+        self.assertEqual(norm["a"], 0.5)
+        self.assertEqual(sum(norm.values()), 1.0)
+        self.assertEqual(list(norm.roots()), [0.5 ** 0.5] * 2)
+
+    def test_update(self):
+        self.tab.update(["th", "th"])
+        self.tab.update({"zz": 3})
+        self.counts.update({"th": 2, "zz": 3})
+        self.assertEqual(self.tab, self.counts)
+        with self.assertRaises(KeyError):
+            self.tab["t?"] = 1
+
+    def test_bytes_alphabet(self):
+        tab = DenseTable.from_counts(count_ngrams(TEXT.encode(), 2, alphabet=b"abcdefghijklmnopqrstuvwxyz"), b"abcdefghijklmnopqrstuvwxyz", 2)
+        self.assertEqual(tab[b"th"], self.counts["th"])
+        self.assertIn(b"th", set(tab))
+
+    def test_map(self):
+        roots = self.tab.normalize().map(math.sqrt)
+        self.assertAlmostEqual(roots["th"] ** 2, self.tab.normalize()["th"])
+
+    def test_overflow_widens(self):
+        self.tab["th"] = 2 ** 40
+        self.assertEqual(self.tab["th"], 2 ** 40)
+
+    def test_pickle(self):
+        for tab in (self.tab, self.tab.normalize()):
+            self.assertEqual(dict(pickle.loads(pickle.dumps(tab)).items()), dict(tab.items()))
+
+
+class TestSparseTable(unittest.TestCase):
+
+    def test_matches_counter(self):
+        for counts in (word_freq(TEXT), Counter(TEXT), Counter(TEXT.encode()), Counter(TEXT.encode().split())):
+            tab = SparseTable.from_counts(counts)
+            self.assertEqual(tab, counts)
+            self.assertEqual(dict(tab.normalize().items()), normalize(counts))
+            self.assertEqual(dict(pickle.loads(pickle.dumps(tab)).items()), dict(counts))
+            self.assertEqual(tab.get(None, 0), 0)
+
+    def test_update(self):
+        counts = word_freq(TEXT)
+        tab = SparseTable.from_counts(counts)
+        tab.update(["aardvark", "the"])
+        tab["zebra"] = 2
+        del tab["dog"]
+        counts.update(["aardvark", "the"])
+        counts["zebra"] = 2
+        del counts["dog"]
+        self.assertEqual(tab, counts)
+        self.assertEqual(list(tab), sorted(counts))
+
+    def test_normalize_is_a_snapshot(self):
+        tab = SparseTable.from_counts(Counter({"b": 1, "c": 1}))
+        norm = tab.normalize()
+        tab["a"] = 2
+        tab.update({"c": 4})
+        self.assertEqual(dict(norm.items()), {"b": 0.5, "c": 0.5})
+
+
+class TestPrune(unittest.TestCase):
+
+    def test_top_n(self):
+        counts = Counter({"a": 5, "b": 3, "c": 1, "d": 1})
+        tab = SparseTable.from_counts(counts).prune(top_n=2)
+        self.assertEqual(dict(tab.items()), {"a": 5, "b": 3, "": 2})
+        self.assertEqual(SparseTable.from_counts(counts).prune(top_n=10), counts)
+
+    def test_cumulative(self):
+        counts = Counter({1: 5, 2: 3, 3: 1, 4: 1})
+        tab = SparseTable.from_counts(counts).normalize().prune(cumulative=0.75)
+        self.assertEqual(dict(tab.items()), {1: 0.5, 2: 0.3, -1: 0.2})
+        self.assertEqual(tab.divisor, 10)
+
+    def test_dense(self):
+        tab = DenseTable.from_counts(count_ngrams(TEXT, 2), "abcdefghijklmnopqrstuvwxyz", 2).normalize()
+        pruned = tab.prune(top_n=5)
+        self.assertEqual(len(pruned), 6)
+        self.assertEqual(sorted(n for key, n in pruned.items() if key), sorted(tab.values())[-5:])
+        self.assertTrue(all(tab[key] == n for key, n in pruned.items() if key))
+        self.assertAlmostEqual(pruned.total(), 1.0)
+
+    def test_other_entry_only_normalizes(self):
+        tab = SparseTable.from_counts(Counter({"a": 5, "b": 3, "c": 1, "d": 1})).normalize()
+        pruned = tab.prune(top_n=2)
+        self.assertAlmostEqual(pruned.total(), 1.0)
+        # Keys the pruned table doesn't have ("c" was pruned away, "z" was never counted) score 0.
+        self.assertEqual(pruned.align({"a": 0.5, "c": 0.25, "z": 0.25}), {pruned.code("a"): 0.5})
+        self.assertEqual(bhattacharyya_coefficient_batch(None, [pruned.align({"c": 1.0})], pruned.roots()), [0.0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import random
+import unittest
+
+import common
+
+from tomb.freqtable import DenseTable, SparseTable
+from tomb.functions import *
+
+
+class TestBhattacharyya(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.keys = ["the", "of", "and", "to", "in", "is", "it", "that"]
+        self.q = {k: rng.random() for k in self.keys}
+        total = sum(self.q.values())
+        self.q = {k: v / total for k, v in self.q.items()}
+        self.ps = []
+        for _ in range(0, 5):
+            p = {k: rng.random() for k in rng.sample(self.keys, 4)}
+            total = sum(p.values())
+            self.ps.append({k: v / total for k, v in p.items()})
+
+    def test_identical(self):
+        self.assertAlmostEqual(bhattacharyya_coefficient(self.q, self.q), 1.0)
+        q = [self.q[k] for k in self.keys]
+        self.assertAlmostEqual(bhattacharyya_coefficient_aligned(q, q), 1.0)
+
+    def test_aligned_matches_dict(self):
+        q = [self.q[k] for k in self.keys]
+        for p in self.ps:
+            aligned = [p.get(k, 0.0) for k in self.keys]
+            self.assertAlmostEqual(bhattacharyya_coefficient_aligned(aligned, q), bhattacharyya_coefficient(p, self.q))
+
+    def test_batch_matches_dict(self):
+        q = [self.q[k] for k in self.keys]
+        exp = [bhattacharyya_coefficient(p, self.q) for p in self.ps]
+        dense = [[p.get(k, 0.0) for k in self.keys] for p in self.ps]
+        sparse = [{self.keys.index(k): v for k, v in p.items()} for p in self.ps]
+        for got in (bhattacharyya_coefficient_batch(q, dense), bhattacharyya_coefficient_batch(q, sparse)):
+            self.assertEqual(len(got), len(exp))
+            for g, e in zip(got, exp):
+                self.assertAlmostEqual(g, e)
+        self.assertEqual(bhattacharyya_coefficient_batch(q, []), [])
+
+    def test_batch_with_table_roots(self):
+        tab = SparseTable()
+        for k in self.keys:
+            tab[k] = int(self.q[k] * 1_000_000)
+        norm = tab.normalize()
+        # Keys the table doesn't have are dropped by align(), and contribute nothing.
+        p = dict(self.ps[0], unseen=0.5)
+        self.assertAlmostEqual(
+            bhattacharyya_coefficient_batch(None, [norm.align(p)], norm.roots())[0],
+            bhattacharyya_coefficient(p, dict(norm.items()))
+        )
+
+    def test_roots_follow_updates(self):
+        tab = SparseTable()
+        tab["a"] = 1
+        self.assertEqual(list(tab.roots()), [1.0])
+        tab["b"] = 3
+        self.assertEqual(list(tab.roots()), [0.5, 0.75 ** 0.5])
+
+    def test_roots_follow_bulk_updates(self):
+        tab = SparseTable()
+        tab["b"] = 1
+        tab.roots()
+        tab.update({"a": 2})
+        # Keys are now ["a", "b"], with b at 1/3.
+        bc = bhattacharyya_coefficient_batch(None, [tab.align({"b": 1.0})], tab.roots())[0]
+        self.assertAlmostEqual(bc, 1 / 3 ** 0.5)
+        tab.update(["c"] * 4 + ["d"] * 2)
+        self.assertEqual(len(tab.roots()), 4)
+        self.assertAlmostEqual(tab.roots()[tab.code("c")], 2 / 3)
+
+        dense = DenseTable("ab", 1)
+        dense["a"] = 1
+        dense.roots()
+        dense.update("bbb")
+        self.assertEqual(list(dense.roots()), [0.5, 0.75 ** 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+import lzma
+import math
+import os
+import pathlib
+import pickle
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import common
+
+from tomb import cache
+from tomb.counting import freq, word_freq, count_ngrams
+from tomb.language import *
+from tomb.language import tables
+from tomb.language.corpus import *
+from tomb.language.modelfile import ModelFileError, open_model, write_model
+from tomb.language.registry import ModelRegistry, available_languages, model_nbytes
+
+
+SAMPLE = "Cooking MC's like a -pound of-bacon; İstanbul --x a-b, naïve CAFÉ\n\tTHE END."
+
+
+def reference_analysis(text):
+    lmd = LanguageModelData.new()
+    freq(text, lmd.char)
+    text = text.lower()
+    word_freq(text, lmd.word)
+    count_ngrams(text, 2, lmd.bigram)
+    count_ngrams(text, 3, lmd.trigram)
+    return lmd
+
+
+def reference_analysis_bytes(data):
+    lmd = LanguageModelData.new()
+    freq(data, lmd.char)
+    data = data.lower()
+    word_freq(data, lmd.word, b"abcdefghijklmnopqrstuvwxyz-", lambda w: w.lstrip(b"-"))
+    count_ngrams(data, 2, lmd.bigram, b"abcdefghijklmnopqrstuvwxyz")
+    count_ngrams(data, 3, lmd.trigram, b"abcdefghijklmnopqrstuvwxyz")
+    return lmd
+
+
+class TestAnalyseLanguage(unittest.TestCase):
+
+    def test_matches_reference(self):
+        for text in (SAMPLE, "", "-", "a", "ab-c"):
+            self.assertEqual(analyse_language(text), reference_analysis(text), text)
+
+    def test_bytes_matches_reference(self):
+        for text in (SAMPLE, "", "-", "a", "ab-c"):
+            data = text.encode()
+            self.assertEqual(analyse_language_bytes(data), reference_analysis_bytes(data), text)
+
+    def test_accumulates(self):
+        lmd = analyse_language("the cat")
+        analyse_language("the hat", lmd)
+        self.assertEqual(lmd.word, {"the": 2, "cat": 1, "hat": 1})
+
+
+class TestPruneModel(unittest.TestCase):
+
+    def test_prune_model(self):
+        lm = analyse_language(SAMPLE * 2).compact().normalize()
+        pruned = prune_model(lm, top_n={"word": 3}, cumulative={"char": 0.5})
+        self.assertEqual(len(pruned.word), 4)
+        self.assertIn("", pruned.word)
+        self.assertLess(len(pruned.char), len(lm.char))
+        self.assertIs(pruned.bigram, lm.bigram)
+        self.assertEqual(len(prune_model(lm, top_n=2).trigram), 3)
+
+
+def forget_quadgram_model():
+    # Generated into a temporary cache, so it mustn't outlive it as a module global either.
+    vars(tables).pop("english_quadgrams", None)
+
+
+class TestQuadgramModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The model is generated from the corpus (once for the whole class), as the cache is empty.
+        common.use_temp_cache(cls)
+        cls.addClassCleanup(forget_quadgram_model)
+        forget_quadgram_model()
+
+    def test_letter_codes(self):
+        self.assertEqual(letter_codes("Ab, z!"), bytes([0, 1, 25]))
+        self.assertEqual(letter_codes(b"Ab, z!"), bytes([0, 1, 25]))
+
+    def test_fitness(self):
+        qm = tables.english_quadgrams
+        self.assertEqual(len(qm.logp), 26 ** 4)
+        self.assertEqual(qm.fitness("abc"), 0.0)
+        self.assertGreater(qm.fitness("Now that the party is jumping"), qm.fitness("Nxw thbt tze pzrty iq jumpxng"))
+
+    def test_rescore_matches_full_score(self):
+        qm = tables.english_quadgrams
+        rng = random.Random(1)
+        codes = bytearray(letter_codes("Now that the party is jumping"))
+        score = qm.score_codes(codes)
+        for _ in range(0, 200):
+            idx = rng.randrange(0, len(codes))
+            new = rng.randrange(0, 26)
+            score = qm.rescore(codes, score, idx, new)
+            codes[idx] = new
+            self.assertAlmostEqual(score, qm.score_codes(codes), places=9)
+
+
+class TestTables(unittest.TestCase):
+
+    def setUp(self):
+        common.use_temp_cache(self)
+        self.addCleanup(forget_quadgram_model)
+        forget_quadgram_model()
+
+    def test_lazy_models(self):
+        tables.preload()
+        self.assertIn("english", vars(tables))
+        self.assertIs(tables.english, tables.english)
+        self.assertIsInstance(tables.english_bytes, LanguageModel)
+        with self.assertRaises(AttributeError):
+            tables.klingon
+
+    def test_model_cache_name(self):
+        name = tables.model_cache_name("language-model", "english", alphabet="abc")
+        self.assertRegex(name, "^language-model-english-[0-9a-f]{16}$")
+        self.assertEqual(tables.model_cache_name("language-model", "english", alphabet="abc"), name)
+        self.assertNotEqual(tables.model_cache_name("language-model", "english", alphabet="xyz"), name)
+        self.assertNotEqual(tables.model_cache_name("language-model", "klingon", alphabet="abc")[-16:], name[-16:])
+
+
+class TestUpdateLanguageModel(unittest.TestCase):
+
+    def setUp(self):
+        common.use_temp_cache(self)
+
+    def tearDown(self):
+        tables.reset_language_model("english")
+        tables.reset_language_model("english", binary=True)
+
+    def test_update_text(self):
+        base = [tab.copy() for tab in tables.load_language_model("english")]
+        text = "Zyxwv quux, zyxwv!"
+        lm = tables.update_language_model("english", text)
+        for tab, counts, new in zip(lm, base, analyse_language(text)):
+            if new:
+                counts.update(new)
+            self.assertEqual(tab.copy(), counts)
+            self.assertAlmostEqual(sum(tab.values()), 1.0)
+        self.assertIs(tables.english, lm)
+        self.assertEqual(tables.load_language_model("english").word, lm.word)
+        # Tables without new counts are kept as they were.
+        self.assertIs(tables.update_language_model("english", "!!!").word, tables.english.word)
+
+        tables.reset_language_model("english")
+        self.assertIsNone(tables.english.word.get("zyxwv"))
+
+    def test_update_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "feed.english.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("zyxwv " * 10)
+            lm = tables.update_language_model("english", [path], binary=True, processes=1)
+        self.assertEqual(lm.word.copy()[b"zyxwv"], 10)
+        self.assertIs(tables.english_bytes, lm)
+
+    def test_update_single_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "zyxwv.english.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("qwxyz " * 10)
+            lm = tables.update_language_model("english", pathlib.Path(path), processes=1)
+            self.assertEqual(lm.word.copy()["qwxyz"], 10)
+            # A plain str is text, not a path.
+            lm = tables.update_language_model("english", path)
+        self.assertEqual(lm.word.copy()["qwxyz"], 10)
+        self.assertEqual(lm.word.copy()["zyxwv"], 1)
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_available_languages(self):
+        self.assertEqual(available_languages(), ["english"])
+
+    def test_lru(self):
+        models = {lang: analyse_language(lang * 100).compact() for lang in ("aaa", "bbb", "ccc")}
+        size = model_nbytes(models["aaa"])
+        reg = ModelRegistry(models.__getitem__, max_bytes=2 * size)
+        self.assertIs(reg.get("aaa"), models["aaa"])
+        reg.get("bbb")
+        reg.get("aaa")
+        reg.get("ccc")
+        self.assertEqual(reg.loaded(), ["aaa", "ccc"])
+        self.assertEqual((reg.loads, reg.evictions, reg.nbytes), (3, 1, 2 * size))
+        reg.max_bytes = 0
+        reg.get("bbb")
+        self.assertEqual(reg.loaded(), ["bbb"])
+        reg.evict("bbb")
+        self.assertEqual((len(reg), reg.nbytes), (0, 0))
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = random.Random(7)
+        words = SAMPLE.split() + ["the", "of", "and", "co-operate", "naïve"]
+        self.texts = [" ".join(rng.choice(words) for _ in range(0, 2000)) + "\n" for _ in range(0, 3)]
+        self.paths = []
+        for i, text in enumerate(self.texts):
+            path = os.path.join(self.tmp.name, f"{i}.english" + (".lzma" if i % 2 else ".txt"))
+            with (lzma.open if i % 2 else open)(path, "wt", encoding="utf-8") as f:
+                f.write(text)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_whitespace_chunks(self):
+        self.assertEqual(list(whitespace_chunks(["  aaa b", "b c dd", "dd \n"], 4)), ["aaa ", "bb c ", "dddd"])
+        self.assertEqual(list(whitespace_chunks([b"abc", b"def"], 2)), [b"abcdef"])
+        self.assertEqual(list(whitespace_chunks([" ", "\n"])), [])
+        self.assertEqual("".join(whitespace_chunks([self.texts[0]], 100)), self.texts[0].strip())
+
+    def test_analyse_stream(self):
+        rng = random.Random(3)
+        text = "\n  " + self.texts[0] + self.texts[1] + " \t"
+        exp = analyse_language(text.strip())
+        for _ in range(0, 5):
+            cuts = sorted(rng.sample(range(0, len(text)), 50))
+            chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+            self.assertEqual(analyse_stream(iter(chunks)), exp)
+            self.assertEqual(analyse_stream(c.encode() for c in chunks), analyse_language_bytes(text.strip().encode()))
+        self.assertEqual(analyse_stream(read_corpus_chunks(self.paths[1], chunk_size=7)), analyse_language(self.texts[1].strip()))
+
+    def test_analyse_corpus(self):
+        exp = merge_language_data(analyse_language(text.strip()) for text in self.texts)
+        self.assertEqual(analyse_corpus(self.paths, processes=1), exp)
+        self.assertEqual(analyse_corpus(self.paths, processes=1, chunk_size=64), exp)
+        self.assertEqual(analyse_corpus(self.paths, processes=2, chunk_size=1000), exp)
+
+    def test_analyse_corpus_binary(self):
+        exp = merge_language_data(analyse_language_bytes(text.strip().encode()) for text in self.texts)
+        self.assertEqual(analyse_corpus(self.paths, binary=True, processes=2, chunk_size=500), exp)
+
+
+class TestModelFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sample.model")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        text = SAMPLE * 3
+        for lmd in (analyse_language(text).compact(), analyse_language_bytes(text.encode()).compact(b"abcdefghijklmnopqrstuvwxyz")):
+            for lm in (lmd, lmd.normalize()):
+                write_model(self.path, lm, 5)
+                mapped = open_model(self.path, 5)
+                for tab, exp in zip(mapped, lm):
+                    self.assertIsInstance(tab.counts, memoryview)
+                    self.assertEqual(tab, exp)
+                    self.assertEqual(pickle.loads(pickle.dumps(tab)), exp)
+                self.assertEqual(mapped.word.map(math.sqrt), lm.word.map(math.sqrt))
+                with self.assertRaises(TypeError):
+                    mapped.char["x"] = 1
+
+    def test_errors(self):
+        write_model(self.path, analyse_language(SAMPLE).compact(), 5)
+        with self.assertRaises(ModelFileError):
+            open_model(self.path, 6)
+        with open(self.path, "r+b") as f:
+            f.write(b"NOTLM!")
+        with self.assertRaises(ModelFileError):
+            open_model(self.path)
+        with self.assertRaises(TypeError):
+            write_model(self.path, analyse_language(SAMPLE))
+
+    def test_source(self):
+        write_model(self.path, analyse_language(SAMPLE).compact(), 5, "0123456789abcdef")
+        self.assertIsInstance(open_model(self.path, 5, "0123456789abcdef"), LanguageModel)
+        with self.assertRaises(ModelFileError):
+            open_model(self.path, 5, "fedcba9876543210")
+        with self.assertRaises(ValueError):
+            write_model(self.path, analyse_language(SAMPLE).compact(), 5, "x" * 17)
+
+    def test_shipped_models(self):
+        self.assertIsInstance(tables.open_model_file("english"), LanguageModel)
+        self.assertIsInstance(tables.open_model_file("english", binary=True), LanguageModel)
+
+    def test_stale_shipped_model_is_rejected(self):
+        # As if a corpus file had been removed: the shipped model no longer matches the inputs.
+        files = tables.corpus_files("english")[1:]
+        generated = analyse_language(SAMPLE).compact().normalize()
+        with mock.patch.object(tables, "corpus_files", return_value=files), \
+                mock.patch.object(tables, "_load_cached", return_value=generated) as load_cached, \
+                mock.patch.object(cache, "TOMB_CACHE_DIR", self.tmp.name):
+            self.assertIsNone(tables.open_model_file("english"))
+            self.assertIsNone(tables.open_model_file("english", binary=True))
+            self.assertIs(tables.load_language_model("english"), generated)
+        load_cached.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,22 @@
 from collections.abc import Iterable, Iterator, Sequence
+from functools import lru_cache
 from typing import Any
 
+__version__ = "0.2.0"
+
+@lru_cache(maxsize=256)
+def xorc_table(k: int) -> bytes:
+    """
+    Translation table mapping each byte to itself XOR k, for bytes.translate().
+    """
+    return bytes(b ^ k for b in range(0, 256))
+
 
 def xorc(d: bytes, k: int) -> bytes:
     """
     XOR each byte with a single byte.
     """
-    return bytes(b ^ k for b in d)
+    return bytes(d).translate(xorc_table(k))
 
 
 def infrep(seq: Iterable[Any]) -> Iterator[Any]:
@@ -1,5 +1,7 @@
 # Mathematical operations on GF(2⁸).
 
+from functools import lru_cache
+
 # What the hell is GF(2⁸)?
 #
 # You may want to refer to:
@@ -125,7 +127,7 @@ def gf2_8_add(a: int, b: int) -> int:
 #
 # This means 3𝑥⁵ + 2𝑥 = 𝑥⁵ in GF(2)
 
-def gf2_8_mul(x: int, y: int) -> int:
+def gf2_8_mul_bitwise(x: int, y: int) -> int:
     # First, compute the product of polynomials x and y (m):
     # Note: the answer will always be within 16 bits.
     m = 0
@@ -146,3 +148,146 @@ def gf2_8_mul(x: int, y: int) -> int:
         # q ^= (1 << q_x)
 
     return m
+
+
+# That's correct, but slow: a loop per bit, and another to reduce.
+#
+# The non-zero elements of GF(2⁸) form a cyclic group under multiplication: there's a generator g such that
+#  every non-zero element is gⁱ for exactly one i in {0..254}. 3 (i.e. 𝑥 + 1) is the smallest such generator.
+#
+# So, like logarithms on the reals turn multiplication into addition:
+#   a × b = g^(logg(a) + logg(b))
+#  and with a table of logarithms (LOG) and one of powers of g (EXP), a product is three lookups and an add.
+#
+# The exponents are modulo 255 (as g²⁵⁵ = 1); EXP is doubled up to 510 entries so that the sum of
+#  two logarithms can index it directly, without the modulo.
+#
+# Inverses fall out of this too: a⁻¹ = g^(255 - logg(a)), and so division and exponentiation.
+
+GF2_8_GENERATOR = 0x03
+
+GF2_8_EXP = bytearray(510)
+GF2_8_LOG = bytearray(256)  # LOG[0] is meaningless (0 isn't a power of g), and left as 0.
+
+def _build_log_tables():
+    e = 1
+    for i in range(0, 255):
+        GF2_8_EXP[i] = GF2_8_EXP[i + 255] = e
+        GF2_8_LOG[e] = i
+        # e × 3 = e × 2 + e, where multiplying by 2 (𝑥) is a shift, reduced if it overflows 8 bits.
+        e ^= ((e << 1) ^ (0x11b if e & 0x80 else 0))
+
+_build_log_tables()
+
+
+def gf2_8_mul(x: int, y: int) -> int:
+    if x == 0 or y == 0:
+        return 0
+    return GF2_8_EXP[GF2_8_LOG[x] + GF2_8_LOG[y]]
+
+
+def gf2_8_inv(x: int) -> int:
+    if x == 0:
+        raise ZeroDivisionError("0 has no multiplicative inverse in GF(2⁸).")
+    return GF2_8_EXP[255 - GF2_8_LOG[x]]
+
+
+def gf2_8_div(x: int, y: int) -> int:
+    if y == 0:
+        raise ZeroDivisionError("division by 0 in GF(2⁸).")
+    if x == 0:
+        return 0
+    return GF2_8_EXP[GF2_8_LOG[x] + 255 - GF2_8_LOG[y]]
+
+
+# Exponents can be negative (x⁻ⁿ = (x⁻¹)ⁿ), and as with integers, x⁰ = 1 (even for x = 0).
+
+def gf2_8_pow(x: int, n: int) -> int:
+    if x == 0:
+        if n < 0:
+            raise ZeroDivisionError("0 has no multiplicative inverse in GF(2⁸).")
+        return 1 if n == 0 else 0
+    return GF2_8_EXP[(GF2_8_LOG[x] * n) % 255]
+
+
+# Bulk operations.
+#
+# Multiplying every byte of some data by the same constant is a byte-to-byte mapping, so it can be done by
+#  bytes.translate() with a table of c × b for every b: one pass in C, however long the data.
+#  (That's just the GMUL*_LUT tables in tomb.aes.constants, for any c.)
+#
+# The full 256×256 product table (64 KiB) is only built if asked for: most uses need only a few rows.
+
+@lru_cache(maxsize=256)
+def gf2_8_mul_row(c: int) -> bytes:
+    """
+    Translation table mapping each byte b to c × b in GF(2⁸), for bytes.translate().
+    """
+    if c == 0:
+        return bytes(256)
+    lc = GF2_8_LOG[c]
+    return bytes([0]) + bytes(GF2_8_EXP[lc + GF2_8_LOG[b]] for b in range(1, 256))
+
+
+@lru_cache(maxsize=None)
+def gf2_8_mul_table() -> tuple[bytes, ...]:
+    """
+    The full product table: gf2_8_mul_table()[a][b] == gf2_8_mul(a, b).
+    """
+    return tuple(gf2_8_mul_row(c) for c in range(0, 256))
+
+
+def gf2_8_add_bytes(a: bytes, b: bytes) -> bytes:
+    """
+    Add (XOR) two equal length byte strings, element-wise.
+    """
+    if len(a) != len(b):
+        raise ValueError("byte strings must be the same length.")
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+def gf2_8_mul_bytes(data: bytes, c: int) -> bytes:
+    """
+    Multiply every byte of data by c.
+    """
+    return bytes(data).translate(gf2_8_mul_row(c))
+
+
+@lru_cache(maxsize=None)
+def _inv_row() -> bytes:
+    return bytes([0]) + bytes(gf2_8_inv(b) for b in range(1, 256))
+
+
+def gf2_8_inv_bytes(data: bytes) -> bytes:
+    """
+    Replace every byte of data by its multiplicative inverse (0 maps to 0, as in the AES S-box).
+    """
+    return bytes(data).translate(_inv_row())
+
+
+def gf2_8_matrix_apply(matrix: list[list[int]], rows: list[bytes]) -> list[bytes]:
+    """
+    Multiply a k×n matrix over GF(2⁸) by n equal length byte strings (the rows of an n×len matrix),
+     returning k byte strings: out[i] = ∑ⱼ matrix[i][j] × rows[j].
+
+    Each column of the rows is a vector the matrix is applied to, so e.g. MixColumns over many AES states,
+     or a Reed-Solomon style encoding of n data streams into k, is one call.
+    """
+    if any(len(r) != len(matrix[0]) for r in matrix):
+        raise ValueError("matrix rows must all be the same length.")
+    if len(rows) != len(matrix[0]):
+        raise ValueError(f"expected {len(matrix[0])} rows of data, got {len(rows)}.")
+    size = len(rows[0]) if rows else 0
+    if any(len(r) != size for r in rows):
+        raise ValueError("rows of data must all be the same length.")
+
+    out = []
+    for coefficients in matrix:
+        acc = 0
+        for c, row in zip(coefficients, rows):
+            if c == 1:
+                acc ^= int.from_bytes(row, "little")
+            elif c:
+                acc ^= int.from_bytes(bytes(row).translate(gf2_8_mul_row(c)), "little")
+        out.append(acc.to_bytes(size, "little"))
+    return out
@@ -0,0 +1,152 @@
+"""
+AES lookup tables, derived from the GF(2⁸) arithmetic in tomb.aes.gf2 rather than written out by hand.
+
+The tables in tomb.aes.constants (S-boxes, round constants and the GMUL*_LUT multiplication tables) are all
+ derived here too, and verify() checks the literals against them.
+
+The T-tables combine SubBytes, ShiftRows and MixColumns (or their inverses) into one lookup per byte:
+ a round is 16 lookups and some XORs, instead of byte-at-a-time table and arithmetic work. That's 4 KiB
+ of 32-bit words each way, so rather than more constants they're derived on first use, and stored in tomb.cache,
+ so later runs (and other processes) just load them.
+
+Every table is a module attribute, computed on first access, so importing this module costs nothing.
+"""
+
+import sys
+from array import array
+from collections.abc import Callable
+from typing import Any
+
+from .. import cache
+from . import constants
+from .gf2 import gf2_8_inv, gf2_8_mul, gf2_8_mul_row
+
+# Bumped when the stored form of the cached tables changes.
+TABLES_FORMAT = 1
+
+
+def derive_s_box() -> array:
+    # SubBytes: take the multiplicative inverse (0 maps to 0), then apply an affine transformation over GF(2):
+    #  each bit is the XOR of itself and the 4 bits following it (cyclically), XOR 0x63.
+    #  As whole bytes, that's b ^ rotl(b, 1) ^ rotl(b, 2) ^ rotl(b, 3) ^ rotl(b, 4) ^ 0x63.
+    s_box = array("B", bytes(256))
+    for i in range(0, 256):
+        b = gf2_8_inv(i) if i else 0
+        s = b
+        for shift in range(1, 5):
+            s ^= ((b << shift) | (b >> (8 - shift))) & 0xFF
+        s_box[i] = s ^ 0x63
+    return s_box
+
+
+def derive_inv_s_box(s_box: array) -> array:
+    inv_s_box = array("B", bytes(256))
+    for i, s in enumerate(s_box):
+        inv_s_box[s] = i
+    return inv_s_box
+
+
+def derive_r_con(count: int = 10) -> list[int]:
+    # Successive powers of 𝑥 (i.e. 2), in the high byte of a word.
+    r_con = []
+    r = 1
+    for _ in range(0, count):
+        r_con.append(r << 24)
+        r = gf2_8_mul(r, 2)
+    return r_con
+
+
+def derive_gmul_lut(c: int) -> array:
+    return array("B", gf2_8_mul_row(c))
+
+
+# T-tables.
+#
+# For an encryption round, each column of output is:
+#
+#   [2 3 1 1] [S(a₀)]
+#   [1 2 3 1] [S(a₁)]
+#   [1 1 2 3] [S(a₂)]
+#   [3 1 1 2] [S(a₃)]
+#
+#  where a₀..a₃ are taken from the diagonal ShiftRows brings into that column. Each a contributes one column of
+#  the matrix, times S(a), to the result, so TE[r][a] is that product as a big-endian word for row r's byte,
+#  and a column is TE[0][a₀] ^ TE[1][a₁] ^ TE[2][a₂] ^ TE[3][a₃]. TE[r] is TE[0] rotated right by 8r bits.
+#
+# TD is the same for decryption: InvSubBytes, then the InvMixColumns matrix [14 11 13 9] (rotated per row),
+#  for the equivalent inverse cipher (which applies InvMixColumns to the round keys).
+
+def _rotations(t0: array) -> tuple[array, ...]:
+    tables = [t0]
+    for r in range(1, 4):
+        tables.append(array("I", (((w >> (8 * r)) | (w << (32 - 8 * r))) & 0xFFFFFFFF for w in t0)))
+    return tuple(tables)
+
+
+def _t_table(sub: array, coefficients: tuple[int, int, int, int]) -> array:
+    rows = [gf2_8_mul_row(c) for c in coefficients]
+    return array("I", (
+        (rows[0][s] << 24) | (rows[1][s] << 16) | (rows[2][s] << 8) | rows[3][s]
+        for s in sub
+    ))
+
+
+def derive_te() -> tuple[array, ...]:
+    return _rotations(_t_table(derive_s_box(), (2, 1, 1, 3)))
+
+
+def derive_td() -> tuple[array, ...]:
+    return _rotations(_t_table(derive_inv_s_box(derive_s_box()), (14, 9, 13, 11)))
+
+
+def _load_cached(kind: str, derive: Callable[[], tuple[array, ...]]) -> tuple[array, ...]:
+    # Stored as one array of 1024 words (the array codec is a raw copy of the machine values).
+    def generate() -> array:
+        words = array("I")
+        for table in derive():
+            words.extend(table)
+        return words
+
+    words = cache.get_or_compute(f"aes-{kind}-v{TABLES_FORMAT}", generate, codec="array")
+    return tuple(words[i:i+256] for i in range(0, 1024, 256))
+
+
+def load_te() -> tuple[array, ...]:
+    return _load_cached("te", derive_te)
+
+
+def load_td() -> tuple[array, ...]:
+    return _load_cached("td", derive_td)
+
+
+_tables: dict[str, Callable[[], Any]] = {
+    "S_BOX": derive_s_box,
+    "INV_S_BOX": lambda: derive_inv_s_box(derive_s_box()),
+    "R_CON": derive_r_con,
+    "GMUL2_LUT": lambda: derive_gmul_lut(2),
+    "GMUL3_LUT": lambda: derive_gmul_lut(3),
+    "GMUL09_LUT": lambda: derive_gmul_lut(9),
+    "GMUL11_LUT": lambda: derive_gmul_lut(11),
+    "GMUL13_LUT": lambda: derive_gmul_lut(13),
+    "GMUL14_LUT": lambda: derive_gmul_lut(14),
+    "TE": load_te,
+    "TD": load_td,
+}
+
+
+def __getattr__(name: str):
+    try:
+        factory = _tables[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    # Once computed, the table is an ordinary module global, so this is only called once per table.
+    table = globals()[name] = factory()
+    return table
+
+
+def verify() -> list[str]:
+    """
+    Derive each of the tables in tomb.aes.constants, and return the names of any that don't match the literals.
+    """
+    mod = sys.modules[__name__]
+    return [name for name in constants.__all__ if getattr(mod, name) != getattr(constants, name)]
@@ -1,10 +1,20 @@
+import heapq
+import itertools
 import math
+import os
 import statistics
-from collections.abc import Iterator
-from typing import Any
+import time
+from binascii import unhexlify
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, NamedTuple, Optional, Union
 
-from .functions import bhattacharyya_coefficient, hamming_distance
-from .language import analyse_language, tables
+from . import xorc
+from .freqtable import FreqTable
+from .functions import bhattacharyya_coefficient, bhattacharyya_coefficient_batch, hamming_distance
+from .language import LanguageModel, LanguageModelData, analyse_language, analyse_language_bytes, tables
+from .language.registry import ModelRegistry, available_languages, model_nbytes
 
 
 def englishness(pt: str) -> float:
@@ -22,16 +32,432 @@ def englishness(pt: str) -> float:
     Output is between 0 (probably not English) and 1 (a perfect sample of English, according to our dataset).
     """
 
-    mod = analyse_language(pt).normalize()
+    return model_similarity(analyse_language(pt).normalize(), tables.english)
 
-    c = bhattacharyya_coefficient(mod.char,    tables.english.char)
-    w = bhattacharyya_coefficient(mod.word,    tables.english.word)
-    b = bhattacharyya_coefficient(mod.bigram,  tables.english.bigram)
-    t = bhattacharyya_coefficient(mod.trigram, tables.english.trigram)
+
+def model_similarity(mod: LanguageModel, model: LanguageModel) -> float:
+    """
+    The score of englishness(), for a normalized model of some text against any (normalized) language model.
+    """
+    c = table_coefficient(mod.char,    model.char)
+    w = table_coefficient(mod.word,    model.word)
+    b = table_coefficient(mod.bigram,  model.bigram)
+    t = table_coefficient(mod.trigram, model.trigram)
 
     return statistics.geometric_mean((c + 1.0, w + 1.0, b + 1.0, t + 1.0)) - 1.0
 
 
+def table_coefficient(p: Mapping[Any, float], q: Mapping[Any, float]) -> float:
+    """
+    Bhattacharyya coefficient of a distribution against a model table.
+
+    FreqTables have an index (and cached roots, see FreqTable.roots()), so p is aligned to it, and only p's
+     entries are visited. Other mappings fall back to bhattacharyya_coefficient() over the union of keys.
+    """
+    if isinstance(q, FreqTable):
+        return bhattacharyya_coefficient_batch(None, (q.align(p),), q.roots())[0]
+    return bhattacharyya_coefficient(p, q)
+
+
+def count_coefficients(rows: list[Mapping[Any, int]], tab: Mapping[Any, float]) -> list[float]:
+    """
+    Bhattacharyya coefficients of many distributions, given as raw counts, against one model table.
+
+    For FreqTables, the rows are aligned to the table's index, and scored together against its cached roots
+     by bhattacharyya_coefficient_batch(). Normalizing each row is folded into a single division by √total.
+    """
+    totals = [sum(counts.values()) for counts in rows]
+    if isinstance(tab, FreqTable):
+        bcs = bhattacharyya_coefficient_batch(None, [tab.align(counts) for counts in rows], tab.roots())
+    else:
+        bcs = [
+            bhattacharyya_coefficient({key: n / total for key, n in counts.items()}, tab) if total else 0.0
+            for counts, total in zip(rows, totals)
+        ]
+    return [bc / math.sqrt(total) if total else 0.0 for bc, total in zip(bcs, totals)]
+
+
+def english_model(binary: bool = False) -> LanguageModel:
+    """The English model, or the byte model."""
+    return tables.english_bytes if binary else tables.english
+
+
+def englishness_batch(candidates: Iterable[Union[str, bytes]]) -> list[float]:
+    """
+    Calculates the "English score" of many candidates at once, see englishness().
+
+    Candidates may be str or bytes. Bytes are scored against the byte-level model (see englishness_bytes()),
+     so there is no need to .decode() (and try/except) every candidate first.
+
+    All candidates are counted first, giving a candidates × features count matrix (stored sparsely,
+     one LanguageModelData per candidate), then each table's coefficients are computed in one batch,
+     against the square roots of the model table, which are shared by all candidates.
+    """
+    candidates = list(candidates)
+    scores = [0.0] * len(candidates)
+    for binary in (False, True):
+        idxs = [idx for idx, c in enumerate(candidates) if isinstance(c, (bytes, bytearray)) == binary]
+        if not idxs:
+            continue
+        analyse = analyse_language_bytes if binary else analyse_language
+        for idx, sc in zip(idxs, model_scores([analyse(candidates[idx]) for idx in idxs], english_model(binary))):
+            scores[idx] = sc
+    return scores
+
+
+def model_scores(counts: list[LanguageModelData], model: LanguageModel) -> list[float]:
+    """
+    Score the counts of many candidates against a model: the geometric mean of the per-table coefficients
+     (plus 1, minus 1), as in englishness().
+    """
+    per_table = [count_coefficients([c[t] for c in counts], tab) for t, tab in enumerate(model)]
+    return [
+        math.exp(math.fsum(math.log(bc + 1.0) for bc in bcs) / len(bcs)) - 1.0
+        for bcs in zip(*per_table)
+    ]
+
+
+# Models of each language, keyed by (lang, binary).
+language_models = ModelRegistry(
+    lambda key: (tables.load_byte_language_model if key[1] else tables.load_language_model)(key[0])
+)
+
+
+def score_all_languages(text: Union[str, bytes], languages: Optional[Iterable[str]] = None) -> dict[str, float]:
+    """
+    Score text against the model of every language (default: every available language, see
+     tomb.language.registry), like englishness() does for English.
+
+    The text is analysed once, and models are loaded on demand and kept in language_models,
+     a memory-bounded LRU. Bytes are scored against the byte models.
+
+    Returns a dict of scores, best first.
+    """
+    binary = isinstance(text, (bytes, bytearray))
+    counts = analyse_language_bytes(text) if binary else analyse_language(text)
+    if languages is None:
+        languages = available_languages()
+    scores = {lang: model_scores([counts], language_models.get((lang, binary)))[0] for lang in languages}
+    return dict(sorted(scores.items(), key=lambda kv: kv[1], reverse=True))
+
+
+class PruningDrift(NamedTuple):
+    samples: int
+    # Absolute differences between full and pruned model scores.
+    mean_drift: float
+    max_drift: float
+    # Fraction of pairs of samples that both models put in the same order.
+    order_agreement: float
+    full_nbytes: int
+    pruned_nbytes: int
+    # Time taken to score all samples with model_similarity() (as englishness() does).
+    full_seconds: float
+    pruned_seconds: float
+
+
+def pruning_drift(full: LanguageModel, pruned: LanguageModel, samples: Iterable[str]) -> PruningDrift:
+    """
+    Compare the scores of samples against a full model, and a pruned version of it (see prune_model()),
+     to decide whether pruning is worth it: how far scores drift, whether rankings change, and the
+     memory and scoring time saved.
+    """
+    mods = [analyse_language(text).normalize() for text in samples]
+    scores, seconds = [], []
+    for model in (full, pruned):
+        start = time.perf_counter()
+        scores.append([model_similarity(mod, model) for mod in mods])
+        seconds.append(time.perf_counter() - start)
+
+    drift = [abs(a - b) for a, b in zip(*scores)]
+    a, b = scores
+    pairs = [(i, j) for i in range(0, len(mods)) for j in range(i + 1, len(mods)) if a[i] != a[j]]
+    agree = sum((a[i] < a[j]) == (b[i] < b[j]) for i, j in pairs)
+
+    return PruningDrift(
+        len(mods),
+        statistics.fmean(drift) if drift else 0.0,
+        max(drift, default=0.0),
+        agree / len(pairs) if pairs else 1.0,
+        model_nbytes(full),
+        model_nbytes(pruned),
+        *seconds,
+    )
+
+
+def englishness_bytes(pt: bytes) -> float:
+    """
+    Calculates a "English score" for raw bytes, without decoding them.
+
+    This is englishness(), but using the byte-level model: byte unigrams, bigrams and trigrams of ASCII letters,
+     and words made of ASCII letters. Stray non-UTF-8 bytes simply lower the score, rather than raising an error.
+    """
+    return englishness_batch((pt,))[0]
+
+
+# Byte classes for the first stage of the scoring cascade.
+PRINTABLE_BYTES = bytes(range(0x20, 0x7F)) + b"\t\n\r"
+LETTER_SPACE_BYTES = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ "
+
+
+def byte_class_ratios(data: bytes) -> tuple[float, float]:
+    """
+    Returns the ratio of printable ASCII bytes, and the ratio of ASCII letters and spaces, in some data.
+
+    Both counts are done by bytes.translate() deleting the class, so this is very cheap.
+    """
+    n = len(data)
+    if n == 0:
+        return 0.0, 0.0
+    printable = n - len(data.translate(None, PRINTABLE_BYTES))
+    letter_space = n - len(data.translate(None, LETTER_SPACE_BYTES))
+    return printable / n, letter_space / n
+
+
+class ScoringCascade:
+    """
+    Early-rejection pipeline in front of englishness_batch().
+
+    Candidates go through three stages, each more expensive than the last:
+     1. "bytes": a byte-class filter. At least min_printable of the bytes must be printable ASCII,
+         and at least min_letter_space of them must be ASCII letters or spaces.
+     2. "char": the Bhattacharyya coefficient of the character distribution alone.
+         The threshold is adaptive: survivors must be within char_margin of the best character score
+         in the batch (and above char_floor). The best min_keep candidates always survive.
+     3. "full": the full four-table englishness score.
+
+    Counts of candidates entering the cascade ("input") and passing each stage are accumulated in
+     self.passed, a Counter, so thresholds can be tuned. Call reset() to clear them.
+
+    Thresholds are relative to the best candidate in each call to score(), so score a whole search
+     space (e.g. all keys for all lines) in one call, rather than piece by piece.
+    """
+
+    def __init__(
+        self,
+        min_printable: float = 0.9,
+        min_letter_space: float = 0.6,
+        char_margin: float = 0.25,
+        char_floor: float = 0.0,
+        min_keep: int = 4
+    ):
+        self.min_printable = min_printable
+        self.min_letter_space = min_letter_space
+        self.char_margin = char_margin
+        self.char_floor = char_floor
+        self.min_keep = min_keep
+        self.passed = Counter()
+
+    def reset(self):
+        self.passed = Counter()
+
+    def score(self, candidates: Iterable[Union[str, bytes]]) -> list[Optional[float]]:
+        """
+        Score candidates, returning the full englishness score of each, or None if it was rejected early.
+        """
+        candidates = list(candidates)
+        scores = [None] * len(candidates)
+        self.passed["input"] += len(candidates)
+
+        # Stage 1: byte classes.
+        survivors = []
+        for idx, c in enumerate(candidates):
+            printable, letter_space = byte_class_ratios(c.encode() if isinstance(c, str) else c)
+            if printable >= self.min_printable and letter_space >= self.min_letter_space:
+                survivors.append(idx)
+        self.passed["bytes"] += len(survivors)
+
+        if not survivors:
+            return scores
+
+        # Stage 2: character distribution only.
+        char_scores = {}
+        for binary in (False, True):
+            idxs = [idx for idx in survivors if isinstance(candidates[idx], (bytes, bytearray)) == binary]
+            if idxs:
+                rows = [Counter(candidates[idx]) for idx in idxs]
+                char_scores.update(zip(idxs, count_coefficients(rows, english_model(binary).char)))
+        best = max(char_scores.values())
+        threshold = max(self.char_floor, best - self.char_margin)
+        keep = set(heapq.nlargest(self.min_keep, char_scores, key=char_scores.__getitem__))
+        survivors = [idx for idx in survivors if char_scores[idx] >= threshold or idx in keep]
+        self.passed["char"] += len(survivors)
+
+        # Stage 3: the full model.
+        for idx, sc in zip(survivors, englishness_batch(candidates[idx] for idx in survivors)):
+            scores[idx] = sc
+        self.passed["full"] += len(survivors)
+
+        return scores
+
+
+_topk_seq = itertools.count()
+
+
+class TopK:
+    """
+    Bounded collector of the k highest scoring items, for brute-force searches.
+
+    Scores are kept in a min-heap of at most k entries, so n pushes cost O(n log k) time and O(k) memory,
+     rather than keeping every score and sorting them all at the end.
+
+    Ties are broken stably: of two equal scores, the one pushed first (the lower order) ranks higher.
+     By default the order is the number of pushes so far, but an explicit order can be given,
+     e.g. a global line number, so that partial results from several workers merge deterministically.
+
+    If a threshold is given, anything scoring below it is rejected outright.
+     admission() gives the lowest score that can still get in, so callers can prune work early.
+    """
+
+    def __init__(self, k: int = 1, threshold: Optional[float] = None):
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        self.k = k
+        self.threshold = threshold
+        # Entries are (score, -order, seq, item), so heap[0] is the worst: the lowest score, pushed last.
+        #  seq is unique (across all collectors), so items are never compared, even if orders clash after a merge.
+        self.heap = []
+        self.pushed = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def admission(self) -> Optional[float]:
+        """Returns the lowest score that would currently be accepted, or None if anything would be."""
+        if len(self.heap) < self.k:
+            return self.threshold
+        return self.heap[0][0]
+
+    def push(self, score: float, item: Any, order: Optional[int] = None) -> bool:
+        """Offer an item, returns True if it was accepted (for now)."""
+        if order is None:
+            order = self.pushed
+        self.pushed += 1
+
+        if self.threshold is not None and score < self.threshold:
+            return False
+
+        entry = (score, -order, next(_topk_seq), item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+            return True
+        if entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+            return True
+        return False
+
+    def extend(self, scored: Iterable[tuple[float, Any]]):
+        """Push every (score, item) pair in an iterable."""
+        for score, item in scored:
+            self.push(score, item)
+
+    def merge(self, other: "TopK") -> "TopK":
+        """Fold in the entries of another collector (e.g. a worker's partial result), keeping their order."""
+        for score, neg_order, _, item in other.heap:
+            self.push(score, item, -neg_order)
+        self.pushed = max(self.pushed, other.pushed)
+        return self
+
+    def results(self) -> list[tuple[float, Any]]:
+        """Returns the collected (score, item) pairs, best first."""
+        return [(score, item) for score, _, _, item in sorted(self.heap, key=lambda e: e[:2], reverse=True)]
+
+    def best(self) -> Any:
+        """Returns the best item, raises a ValueError if nothing has been collected."""
+        if not self.heap:
+            raise ValueError("nothing has been collected.")
+        return max(self.heap, key=lambda e: e[:2])[3]
+
+
+def scan_single_byte_xor(lines: Iterable[tuple[int, bytes]], k: int = 1) -> tuple[TopK, Counter[str]]:
+    """
+    Try every single-byte XOR key on each (line number, ciphertext) pair, and collect the k best decryptions.
+
+    Items in the returned TopK are (line number, key, ciphertext) tuples, and ties are broken by line then key.
+     The per-stage pass counts of the ScoringCascade used are returned alongside.
+    """
+    lines = list(lines)
+    cascade = ScoringCascade()
+    top = TopK(k)
+    candidates = [(ln, key, ct) for ln, ct in lines for key in range(0, 256)]
+    scores = cascade.score(xorc(ct, key) for _, key, ct in candidates)
+    for (ln, key, ct), sc in zip(candidates, scores):
+        if sc is not None:
+            top.push(sc, (ln, key, ct), ln * 256 + key)
+    return top, cascade.passed
+
+
+def _warm_scanner():
+    # Runs once in each worker process, so the models (and their roots) are loaded before the first chunk.
+    for binary in (False, True):
+        for tab in english_model(binary):
+            tab.roots()
+
+
+def _scan_hex_chunk(chunk: list[tuple[int, Union[str, bytes]]], k: int) -> tuple[TopK, Counter[str]]:
+    lines = []
+    for ln, line in chunk:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            lines.append((ln, unhexlify(line)))
+        except ValueError:
+            pass
+    return scan_single_byte_xor(lines, k)
+
+
+def _hex_line_chunks(source: Union[str, os.PathLike, Iterable[Union[str, bytes]]], size: int) -> Iterator[list]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _hex_line_chunks(f, size)
+        return
+
+    chunk = []
+    for ln, line in enumerate(source, 1):
+        chunk.append((ln, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def detect_single_byte_xor(
+    source: Union[str, os.PathLike, Iterable[Union[str, bytes]]],
+    k: int = 1,
+    processes: Optional[int] = None,
+    chunk_lines: int = 256
+) -> TopK:
+    """
+    Find the lines most likely to be English XOR'd with a single byte, in a (possibly huge) file of hex lines.
+
+    source may be a path, or any iterable of hex lines (e.g. an open file). Lines are streamed in chunks of
+     chunk_lines to a pool of worker processes (default: one per CPU), each of which keeps the language models
+     loaded. At most two chunks per worker are in flight at once, and only each chunk's top k is sent back,
+     so memory use does not grow with the size of the input.
+
+    Returns a TopK of (line number, key, ciphertext) items. Line numbers start at 1, blank and non-hex lines are skipped.
+
+    Note the ScoringCascade thresholds are relative to the best candidate in each chunk, so while the best
+     result is exact, lower ranks may miss lines that lost out to a much better line in the same chunk.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    top = TopK(k)
+    with ProcessPoolExecutor(processes, initializer=_warm_scanner) as pool:
+        pending = set()
+        for chunk in _hex_line_chunks(source, chunk_lines):
+            if len(pending) >= 2 * processes:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    top.merge(fut.result()[0])
+            pending.add(pool.submit(_scan_hex_chunk, chunk, k))
+        for fut in pending:
+            top.merge(fut.result()[0])
+    return top
+
+
 def guess_vignere_key_length(ct: bytes, start: int = 1, end: int = -1, samples: int = -1) -> Iterator[int]:
     """
     Guess the key length for Vignére-like repeating key ciphers.
@@ -105,13 +531,19 @@ def guess_vignere_key_length(ct: bytes, start: int = 1, end: int = -1, samples:
     m = statistics.mean(guesses.values())
     d = statistics.stdev(guesses.values())
 
-    more_likely = sorted(((l, sc) for l, sc in guesses.items() if (sc + d) - m < 0.0), key=lambda p: p[0])
-    less_likely = sorted(((l, sc) for l, sc in guesses.items() if l not in {e for e, _ in more_likely}), key=lambda p: p[1])
+    # Guesses were made in order of key length, so the more likely ones need no sorting.
+    # The rest are heapified and popped lazily, as callers tend to stop after the first few.
+    more_likely = [(l, sc) for l, sc in guesses.items() if (sc + d) - m < 0.0]
+    less_likely = [(sc, l) for l, sc in guesses.items() if (sc + d) - m >= 0.0]
+    heapq.heapify(less_likely)
 
     for l, _ in more_likely:
         yield l
 
-    for l, _ in less_likely:
+    popped = []
+    while less_likely:
+        sc, l = heapq.heappop(less_likely)
+        popped.append((l, sc))
         yield l
 
-    return more_likely + less_likely
+    return more_likely + popped
@@ -1,12 +1,46 @@
 """
 Generic caching library for the tomb package.
+
+There are two tiers: pickle files in TOMB_CACHE_DIR, shared by every process (and run),
+ and a process-local LRU of objects, `memory`, in front of them. get_or_compute() goes through both.
+
+Entries are written with a codec (pickle, by default with protocol 5 and out-of-band buffers,
+ or the raw bytes of an array, or NumPy's .npy format), optionally compressed (zlib or lzma).
+ A small header records both, so load() works out how to read any entry. Files without a header
+ are plain pickles, as written by older versions.
+
+The cache directory can be capped with a quota (TOMB_CACHE_MAX_BYTES in the environment, or set_quota()):
+ when a write takes it over, the least recently used entries are evicted. Run `python3 -m tomb.cache`
+ to list, prune, clear or warm entries, or to see stats().
+
+Files are written atomically (to a temporary file, then renamed into place), so readers never see
+ a partial file. get_or_compute() holds a lock file (.{name}.lock) while computing, so when several
+ processes miss at once, one computes, and the rest wait for it and read the result.
 """
 
+import argparse
+import functools
+import hashlib
 import io
+import lzma
 import os
 import pickle as mod_pickle
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, NamedTuple, Optional
 
-from typing import Any
+try:
+    import fcntl
+except ImportError:
+    # No flock() (e.g. on Windows): writes are still atomic, but concurrent misses all compute.
+    fcntl = None
 
 TOMB_CACHE_DIR = os.path.join(
     os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
@@ -19,6 +53,9 @@ try:
 except OSError:
     cache_available = False
 
+# Maximum total size of the cache directory, in bytes (None for no limit).
+quota: Optional[int] = int(os.getenv("TOMB_CACHE_MAX_BYTES", "0")) or None
+
 
 class CacheError(Exception):
     pass
@@ -27,32 +64,661 @@ class CacheError(Exception):
 def cache_file_path(name: str) -> str:
     if "/" in name:
         raise ValueError("cache file name cannot contain slashes.")
+    if name.startswith("."):
+        raise ValueError("cache file names starting with '.' are reserved.")
     return os.path.join(TOMB_CACHE_DIR, name)
 
 
 def invalidate(name: str):
-    path = cache_file_path(name)
-    if os.path.exists(path):
-        os.unlink(path)
+    memory.invalidate(name)
+    try:
+        os.unlink(cache_file_path(name))
+    except FileNotFoundError:
+        pass
+    _touched.pop(name, None)
+    _remove_lock(name)
 
 
 def exists(name: str) -> bool:
     return os.path.exists(cache_file_path(name))
 
 
-def pickle(name: str, obj: Any):
+def entries(prefix: str = "") -> list[str]:
+    """
+    Names of the cache entries starting with prefix.
+    """
     try:
-        with open(cache_file_path(name), "wb") as f:
-            return mod_pickle.dump(obj, f)
-    except Exception as err:
+        names = os.listdir(TOMB_CACHE_DIR)
+    except OSError:
+        return []
+    # Dot files are temporary files and locks.
+    return sorted(name for name in names if name.startswith(prefix) and not name.startswith("."))
+
+
+# Objects served from memory (see get_or_compute()) are still in use, so their entries are touched too,
+#  but at most once every TOUCH_INTERVAL seconds each.
+TOUCH_INTERVAL = 60.0
+_touched: dict[str, float] = {}
+
+
+def touch(name: str):
+    """
+    Record an access to an entry (its modification time is used as its last access time, see evict()).
+    """
+    _touched[name] = time.monotonic()
+    try:
+        os.utime(cache_file_path(name))
+    except OSError:
+        pass
+
+
+def _touch_hit(name: str):
+    last = _touched.get(name)
+    if last is None or time.monotonic() - last >= TOUCH_INTERVAL:
+        touch(name)
+
+
+def evict(
+    prefix: str = "",
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    keep: Optional[str] = None
+) -> list[str]:
+    """
+    Remove the least recently used entries starting with prefix (except keep), until there are at most
+     max_entries of them, totalling at most max_bytes. Returns the names of the removed entries.
+    """
+    found = []
+    for name in entries(prefix):
+        if name == keep:
+            continue
+        try:
+            st = os.stat(cache_file_path(name))
+        except OSError:
+            continue
+        found.append((st.st_mtime, st.st_size, name))
+    found.sort()
+
+    count, nbytes = len(found), sum(size for _, size, _ in found)
+    if keep is not None and exists(keep):
+        count += 1
+        nbytes += os.path.getsize(cache_file_path(keep))
+    removed = []
+    for _, size, name in found:
+        if (max_entries is None or count <= max_entries) and (max_bytes is None or nbytes <= max_bytes):
+            break
         invalidate(name)
-        raise CacheError("Failed to write/pickle cache object") from err
+        removed.append(name)
+        count -= 1
+        nbytes -= size
+    return removed
 
 
-def unpickle(name: str) -> Any:
+def prune(stem: str, keep: str) -> list[str]:
+    """
+    Remove the entries named stem, or stem-<anything>, except keep.
+
+    Used to garbage-collect stale versions of an entry, when names are stem-<hash of inputs>.
+     Returns the names of the removed entries.
+    """
+    removed = []
+    for name in entries(stem):
+        if name != keep and (name == stem or name.startswith(f"{stem}-")):
+            invalidate(name)
+            removed.append(name)
+    return removed
+
+
+# Codecs.
+#
+# A codec turns an object into a list of bytes-like chunks (written one after the other),
+#  and back from a memoryview of the whole payload.
+
+class Codec(NamedTuple):
+    id: int
+    dumps: Callable[[Any], list[Any]]
+    loads: Callable[[memoryview], Any]
+
+
+class Compression(NamedTuple):
+    id: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[memoryview], bytes]
+
+
+def _pickle_dumps(obj: Any) -> list[Any]:
+    return [mod_pickle.dumps(obj)]
+
+
+def _pickle_loads(data: memoryview) -> Any:
+    return mod_pickle.loads(data)
+
+
+# Protocol 5 pickles large buffers (bytearrays, NumPy arrays, ...) out-of-band: they're written raw after
+#  the pickle stream, and handed back to pickle.loads() as slices of the file, rather than being copied
+#  in and out of the stream. Layout: number of buffers (u32), lengths of the stream and buffers (u64 each),
+#  the stream, the buffers.
+
+def _pickle5_dumps(obj: Any) -> list[Any]:
+    buffers = []
+    data = mod_pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raws = [buf.raw() for buf in buffers]
+    lengths = struct.pack(f"<I{len(raws) + 1}Q", len(raws), len(data), *(raw.nbytes for raw in raws))
+    return [lengths, data, *raws]
+
+
+def _pickle5_loads(data: memoryview) -> Any:
+    (n,) = struct.unpack_from("<I", data)
+    lengths = struct.unpack_from(f"<{n + 1}Q", data, 4)
+    pos = 4 + 8 * (n + 1)
+    chunks = []
+    for length in lengths:
+        chunks.append(data[pos:pos+length])
+        pos += length
+    return mod_pickle.loads(chunks[0], buffers=chunks[1:])
+
+
+# An array.array, as its typecode and raw (native) machine values. Loading is a single copy.
+
+def _array_dumps(obj: array) -> list[Any]:
+    if not isinstance(obj, array):
+        raise TypeError(f"the array codec can only store arrays, not {type(obj).__name__}.")
+    return [obj.typecode.encode(), memoryview(obj).cast("B")]
+
+
+def _array_loads(data: memoryview) -> array:
+    arr = array(chr(data[0]))
+    arr.frombytes(data[1:])
+    return arr
+
+
+# A NumPy array, in .npy format. Only available if NumPy is installed.
+
+def _npy_dumps(obj: Any) -> list[Any]:
+    import numpy
+    buf = io.BytesIO()
+    numpy.save(buf, obj, allow_pickle=False)
+    return [buf.getbuffer()]
+
+
+def _npy_loads(data: memoryview) -> Any:
+    import numpy
+    return numpy.load(io.BytesIO(data), allow_pickle=False)
+
+
+CODECS: dict[str, Codec] = {
+    "pickle": Codec(1, _pickle_dumps, _pickle_loads),
+    "pickle5": Codec(2, _pickle5_dumps, _pickle5_loads),
+    "array": Codec(3, _array_dumps, _array_loads),
+    "npy": Codec(4, _npy_dumps, _npy_loads),
+}
+
+COMPRESSIONS: dict[str, Compression] = {
+    "zlib": Compression(1, zlib.compress, zlib.decompress),
+    "lzma": Compression(2, lzma.compress, lzma.decompress),
+}
+
+DEFAULT_CODEC = "pickle5"
+
+# Header: magic, header version, codec id, compression id (0 for none), reserved.
+_MAGIC = b"TOMB"
+_HEADER = struct.Struct("<4sBBBx")
+
+
+def register_codec(name: str, codec: Codec):
+    """
+    Add a codec. Its id is stored in the header of each entry, so it must be unique, and never change.
+    """
+    if any(c.id == codec.id for c in CODECS.values()):
+        raise ValueError(f"codec id {codec.id} is already taken.")
+    CODECS[name] = codec
+
+
+def store(name: str, obj: Any, codec: str = DEFAULT_CODEC, compression: Optional[str] = None):
+    """
+    Write obj to the cache entry name, with the given codec and (optional) compression.
+    """
+    # Whatever's in memory under this name is now stale.
+    memory.invalidate(name)
+    path = cache_file_path(name)
+    tmp = None
+    try:
+        c = CODECS[codec]
+        z = COMPRESSIONS[compression] if compression is not None else None
+        chunks = c.dumps(obj)
+        if z is not None:
+            chunks = [z.compress(b"".join(chunks))]
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}.", dir=TOMB_CACHE_DIR)
+        with open(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, 1, c.id, z.id if z is not None else 0))
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except Exception as err:
+        if tmp is not None and os.path.exists(tmp):
+            os.unlink(tmp)
+        raise CacheError(f"Failed to write cache object ({codec}, {compression})") from err
+    if quota is not None:
+        evict(max_bytes=quota, keep=name)
+
+
+def set_quota(max_bytes: Optional[int]):
+    """
+    Cap the total size of the cache directory (None for no limit), evicting least recently used entries now.
+    """
+    global quota
+    quota = max_bytes
+    if quota is not None:
+        evict(max_bytes=quota)
+
+
+def load(name: str) -> Any:
+    """
+    Read the cache entry name, whatever codec and compression it was written with, and touch() it.
+    """
+    start = time.perf_counter()
     try:
         with open(cache_file_path(name), "rb") as f:
-            return mod_pickle.load(f)
+            data = f.read()
+        if data[:4] != _MAGIC:
+            obj = mod_pickle.loads(data)
+        else:
+            _, version, codec_id, compression_id = _HEADER.unpack_from(data)
+            codec = next(c for c in CODECS.values() if c.id == codec_id)
+            payload = memoryview(data)[_HEADER.size:]
+            if compression_id:
+                z = next(z for z in COMPRESSIONS.values() if z.id == compression_id)
+                payload = memoryview(z.decompress(payload))
+            obj = codec.loads(payload)
     except Exception as err:
         invalidate(name)
-        raise CacheError("Failed to read/unpickle cache object") from err
+        raise CacheError("Failed to read cache object") from err
+    load_times["loads"] += 1
+    load_times["seconds"] += time.perf_counter() - start
+    touch(name)
+    return obj
+
+
+# Number of, and total time taken by, successful load() calls.
+load_times = {"loads": 0, "seconds": 0.0}
+
+
+def pickle(name: str, obj: Any):
+    store(name, obj, "pickle")
+
+
+def unpickle(name: str) -> Any:
+    return load(name)
+
+
+def _lock_path(name: str) -> str:
+    return os.path.join(TOMB_CACHE_DIR, f".{name}.lock")
+
+
+@contextmanager
+def lock(name: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on name (between processes, on this host), blocking until it is available.
+
+    The entry itself is not locked: readers never need to lock, as writes are atomic.
+    """
+    if fcntl is None or not cache_available:
+        yield
+        return
+    with open(_lock_path(name), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _remove_lock(name: str):
+    # Lock files are removed along with their entry, but only if nobody holds them. (If someone opens one
+    #  just before it is removed, the worst case is two processes computing the same entry.)
+    path = _lock_path(name)
+    if fcntl is None or not os.path.exists(path):
+        return
+    try:
+        with open(path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.unlink(path)
+    except OSError:
+        pass
+
+
+def approx_size(obj: Any, deep: bool = True) -> int:
+    """
+    Rough memory footprint of an object, for bounding the memory cache.
+
+    Objects with an nbytes() method or nbytes attribute (e.g. FreqTables, memoryviews) report their own size.
+     Tuples, lists and dicts are summed over their items (one level deep, not recursively).
+    """
+    nbytes = getattr(obj, "nbytes", None)
+    if callable(nbytes):
+        return nbytes()
+    if isinstance(nbytes, int):
+        return nbytes
+    if deep and isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(approx_size(item, False) for item in obj)
+    if deep and isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(k) + approx_size(v, False) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class MemoryCache:
+    """
+    Process-local least recently used cache of objects, bounded by entry count, and (approximate) total size.
+
+    Entries expire ttl seconds after they were stored, if ttl is given. The most recently stored entry
+     is always kept, even if it is larger than max_bytes on its own.
+
+    Objects are shared, not copied, so don't modify them.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 << 20, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # name -> (object, size, expiry time)
+        self.entries: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __contains__(self, name: str) -> bool:
+        entry = self.entries.get(name)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        entry = self.entries.get(name)
+        if entry is not None and entry[2] <= time.monotonic():
+            self.invalidate(name)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(name)
+        return entry[0]
+
+    def put(self, name: str, obj: Any):
+        self.invalidate(name)
+        size = approx_size(obj)
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self.entries[name] = (obj, size, expiry)
+        self.nbytes += size
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (_, evicted, _) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def invalidate(self, name: str):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+memory = MemoryCache()
+
+_missing = object()
+
+# Counts of get_or_compute() results, by where the object came from.
+counters = {"memory": 0, "disk": 0, "computed": 0}
+
+
+def get_or_compute(
+    name: str,
+    factory: Callable[[], Any],
+    persist: bool = True,
+    codec: str = DEFAULT_CODEC,
+    compression: Optional[str] = None
+) -> Any:
+    """
+    Returns the object cached under name: from memory, else from disk (if persist), else by calling factory(),
+     storing it in both tiers (on disk with the given codec and compression, see store()).
+
+    Failing to write to disk is not an error: the object is still returned (and kept in memory).
+    """
+    obj = memory.get(name, _missing)
+    if obj is not _missing:
+        counters["memory"] += 1
+        if persist:
+            _touch_hit(name)
+        return obj
+
+    if not persist:
+        obj = factory()
+        counters["computed"] += 1
+    else:
+        obj = _read(name)
+        if obj is _missing:
+            # Single flight: whoever gets the lock first computes, everyone else finds the result on disk.
+            with lock(name):
+                obj = _read(name)
+                if obj is _missing:
+                    obj = factory()
+                    counters["computed"] += 1
+                    try:
+                        store(name, obj, codec, compression)
+                    except CacheError:
+                        pass
+            # Anyone arriving from now on finds the entry, so the lock file isn't needed any more.
+            _remove_lock(name)
+
+    memory.put(name, obj)
+    return obj
+
+
+def stats() -> dict[str, Any]:
+    """
+    Summary of the cache: entries and bytes on disk, the quota, and for this process,
+     get_or_compute() results and hit rate (from memory or disk), and the average load() time.
+    """
+    sizes = []
+    for name in entries():
+        try:
+            sizes.append(os.path.getsize(cache_file_path(name)))
+        except OSError:
+            pass
+    lookups = sum(counters.values())
+    return {
+        "directory": TOMB_CACHE_DIR,
+        "entries": len(sizes),
+        "bytes": sum(sizes),
+        "quota": quota,
+        **{f"{source}_results": n for source, n in counters.items()},
+        "hit_rate": (counters["memory"] + counters["disk"]) / lookups if lookups else None,
+        "loads": load_times["loads"],
+        "average_load_seconds": load_times["seconds"] / load_times["loads"] if load_times["loads"] else None,
+        "memory": memory.stats(),
+    }
+
+
+def _read(name: str) -> Any:
+    if exists(name):
+        try:
+            obj = load(name)
+            counters["disk"] += 1
+            return obj
+        except CacheError:
+            pass
+    return _missing
+
+
+# Persistent memoization.
+
+def _hash_value(h: Any, value: Any):
+    # Every value is tagged with its type (and length, if variable), so distinct arguments can't collide.
+    if value is None:
+        h.update(b"N")
+    elif isinstance(value, bool):
+        h.update(b"T" if value else b"F")
+    elif isinstance(value, int):
+        h.update(b"i%d;" % value)
+    elif isinstance(value, float):
+        h.update(b"f" + value.hex().encode() + b";")
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        h.update(b"s%d:" % len(data) + data)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        h.update(b"b%d:" % len(data) + data)
+    elif isinstance(value, (tuple, list)):
+        h.update(b"(" if isinstance(value, tuple) else b"[")
+        for item in value:
+            _hash_value(h, item)
+        h.update(b")")
+    else:
+        raise TypeError(f"cannot memoize on an argument of type {type(value).__name__}.")
+
+
+def args_key(args: tuple, kwargs: dict[str, Any]) -> str:
+    """
+    A stable (between runs, and processes) hash of function arguments: None, bools, ints, floats,
+     str, bytes, and tuples and lists of them.
+    """
+    h = hashlib.sha256()
+    _hash_value(h, args)
+    _hash_value(h, tuple(sorted(kwargs.items())))
+    return h.hexdigest()[:32]
+
+
+def memoize(
+    namespace: str,
+    version: int = 0,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    codec: str = DEFAULT_CODEC,
+    compression: Optional[str] = None
+) -> Callable[[Callable], Callable]:
+    """
+    Decorator that caches the results of a pure function, in memory and on disk, keyed by its arguments
+     (see args_key()), so they survive restarts:
+
+        @memoize("vigenere-key-lengths", version=1)
+        def key_lengths(ct: bytes) -> list[int]: ...
+
+    Results are stored as memo-{namespace}-v{version}-{hash of arguments}. Bump version when the function
+     changes: entries of other versions are removed on first use. At most max_entries results totalling
+     max_bytes (on disk) are kept per namespace, the least recently used are evicted.
+
+    The decorated function has cache_name(*args, **kwargs), invalidate(*args, **kwargs) and clear().
+    """
+    if "-" in namespace or "/" in namespace:
+        raise ValueError("memoize namespaces cannot contain '-' or '/'.")
+    stem = f"memo-{namespace}"
+    prefix = f"{stem}-v{version}-"
+
+    def decorator(func: Callable) -> Callable:
+        stale_removed = False
+
+        def cache_name(*args: Any, **kwargs: Any) -> str:
+            return prefix + args_key(args, kwargs)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            nonlocal stale_removed
+            if not stale_removed:
+                for name in entries(f"{stem}-"):
+                    if not name.startswith(prefix):
+                        invalidate(name)
+                stale_removed = True
+
+            computed = False
+
+            def compute() -> Any:
+                nonlocal computed
+                computed = True
+                return func(*args, **kwargs)
+
+            result = get_or_compute(cache_name(*args, **kwargs), compute, codec=codec, compression=compression)
+            # Only a new entry can take the namespace over its limits.
+            if computed and (max_entries is not None or max_bytes is not None):
+                evict(prefix, max_entries, max_bytes)
+            return result
+
+        def invalidate_args(*args: Any, **kwargs: Any):
+            invalidate(cache_name(*args, **kwargs))
+
+        def clear():
+            for name in entries(prefix):
+                invalidate(name)
+
+        wrapper.cache_name = cache_name
+        wrapper.invalidate = invalidate_args
+        wrapper.clear = clear
+        return wrapper
+
+    return decorator
+
+
+# Command line interface: python3 -m tomb.cache ...
+
+def _warm():
+    # Import here: tomb.language uses this module.
+    from .language import tables
+    tables.preload()
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python3 -m tomb.cache", description="Manage the tomb cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ls = commands.add_parser("list", help="list entries, least recently used first")
+    ls.add_argument("prefix", nargs="?", default="")
+    pr = commands.add_parser("prune", help="evict least recently used entries down to a size/count")
+    pr.add_argument("prefix", nargs="?", default="")
+    pr.add_argument("--max-bytes", type=int)
+    pr.add_argument("--max-entries", type=int)
+    cl = commands.add_parser("clear", help="remove entries")
+    cl.add_argument("prefix", nargs="?", default="")
+    commands.add_parser("warm", help="load (generating if needed) the language models")
+    commands.add_parser("stats", help="show stats()")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        listing = []
+        for name in entries(args.prefix):
+            st = os.stat(cache_file_path(name))
+            listing.append((st.st_mtime, st.st_size, name))
+        for mtime, size, name in sorted(listing):
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))} {size:>12} {name}")
+    elif args.command == "prune":
+        for name in evict(args.prefix, args.max_entries, args.max_bytes):
+            print(f"evicted {name}")
+    elif args.command == "clear":
+        for name in entries(args.prefix):
+            invalidate(name)
+            print(f"removed {name}")
+    elif args.command == "warm":
+        _warm()
+        print(f"warm: {counters['disk']} loaded, {counters['computed']} computed")
+    elif args.command == "stats":
+        for key, value in stats().items():
+            print(f"{key:24} {value}")
+
+
+if __name__ == "__main__":
+    # Use the tomb.cache module the rest of the package uses, rather than this __main__ copy of it.
+    from tomb import cache as _cache
+    _cache.main(sys.argv[1:])
@@ -1,7 +1,11 @@
 import re
-from collections import deque, Counter, Iterable
+from collections import deque, Counter
+from collections.abc import Iterable
+from functools import lru_cache
 from typing import Any, Callable, Optional, Union
 
+from .freqtable import FreqTable
+
 # Assumptions:
 #  - Textish instances have a .join() method.
 #  - Textish instances can be created using an 0-arg constructor.
@@ -20,15 +24,40 @@ def count_ngrams(
 
     Each character must be in the alphabet supplied.
     The type of data and alphabet must be compatible.
-    Keys in the resultant counter will inherit the type of the alphabet.
+    Keys in the resultant counter will inherit the type of the alphabet,
+     except that a bytearray alphabet produces bytes keys (bytearrays are not hashable).
 
     The default alphabet is a alphabetical string, in lowercase.
     """
-    # Empty instance of alphabet's type is used to .join() on.
-    # Allows str/bytes/bytearray to work as expected.
-    e = type(alphabet)()
+    if n < 1:
+        raise ValueError("N-grams must be at least one character long.")
     if tab is None:
         tab = Counter()
+
+    if isinstance(data, (str, bytes, bytearray)):
+        # Fast path: a regex finds the maximal runs of alphabet characters, which are counted by slicing.
+        if alphabet:
+            count_run_ngrams(_alphabet_runs(bytes(alphabet) if isinstance(alphabet, bytearray) else alphabet).findall(data), n, tab)
+        return tab
+
+    return _count_ngrams_iter(data, n, tab, alphabet)
+
+
+@lru_cache(maxsize=32)
+def _alphabet_runs(alphabet: Union[str, bytes]) -> re.Pattern:
+    if isinstance(alphabet, str):
+        return re.compile(f"[{re.escape(alphabet)}]+")
+    return re.compile(b"[" + re.escape(alphabet) + b"]+")
+
+
+def _count_ngrams_iter(data: Iterable[Any], n: int, tab: Counter[Textish], alphabet: Textish) -> Counter[Textish]:
+    # Slow path, for any iterable of characters.
+    if isinstance(alphabet, (bytes, bytearray)):
+        # Iterating over bytes-like objects produces ints, which bytes() will happily pack.
+        join = bytes
+    else:
+        # Empty instance of alphabet's type is used to .join() on.
+        join = type(alphabet)().join
     q = deque()
     for char in data:
         if char not in alphabet:
@@ -37,20 +66,41 @@ def count_ngrams(
         q.append(char)
         if len(q) < n:
             continue
-        tab[e.join(q)] += 1
+        tab[join(q)] += 1
         q.popleft()
     return tab
 
 
+def count_run_ngrams(runs: Iterable[Textish], n: int, tab: Optional[Counter[Textish]] = None) -> Counter[Textish]:
+    """
+    Count N-grams within each of a series of runs of text.
+
+    Every character of every run is assumed to be in the alphabet, i.e. N-grams never span two runs.
+    N-grams are slices of the runs, so they are counted by Counter.update() in a single C-level pass.
+    """
+    if tab is None:
+        tab = Counter()
+    tab.update(run[i:i+n] for run in runs for i in range(0, len(run) - n + 1))
+    return tab
+
+
 def word_freq(
-    s: str,
-    tab: Optional[Counter[str]] = None,
-    alphabet: str = "abcdefghijklmnopqrstuvwxyz-",
-    scrub: Callable[[str], str] = lambda s: s.lstrip("-")
-) -> Counter[str]:
+    s: Textish,
+    tab: Optional[Counter[Textish]] = None,
+    alphabet: Textish = "abcdefghijklmnopqrstuvwxyz-",
+    scrub: Callable[[Textish], Textish] = lambda s: s.lstrip("-")
+) -> Counter[Textish]:
+    """
+    Count words, i.e. runs of characters in the alphabet, in text.
+
+    Works on bytes too, given a bytes alphabet and a scrub function that handles bytes.
+    """
     eal = re.escape(alphabet)
-    raw = re.split(f"[^{eal}]+", s)
-    scrubbed = filter(lambda s: s is not None and s != "", (scrub(word) for word in raw))
+    if isinstance(alphabet, str):
+        raw = re.split(f"[^{eal}]+", s)
+    else:
+        raw = re.split(b"[^" + eal + b"]+", s)
+    scrubbed = filter(None, (scrub(word) for word in raw))
     return freq(scrubbed, tab)
 
 
@@ -62,7 +112,9 @@ def freq(s: Iterable[Any], tab: Optional[Counter[Any]] = None) -> Counter[Any]:
     return tab
 
 
-def normalize(tab: Union[Counter[Any], dict[Any, float]]) -> dict[Any, float]:
+def normalize(tab: Union[Counter[Any], dict[Any, float], FreqTable]) -> Union[dict[Any, float], FreqTable]:
+    if isinstance(tab, FreqTable):
+        return tab.normalize()
     if isinstance(tab, Counter):
         seq = tab.most_common()
     else:
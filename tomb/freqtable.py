@@ -0,0 +1,482 @@
+"""
+Compact, array-backed frequency tables.
+
+Language models are made of a lot of small counts and probabilities, and storing them as Counters
+ (or dicts of floats) costs a hash table slot, a key object and a value object per entry.
+ The tables here keep the values in a single array instead:
+
+ - DenseTable: N-grams over a fixed alphabet. Values are indexed by the base-|alphabet| code of the N-gram,
+    e.g. with the alphabet "abc...z", "ab" is at index 0×26 + 1. No keys are stored at all.
+ - SparseTable: anything else (words, characters). Keys are kept sorted, and looked up by bisection.
+
+Both are Mappings, and support the Counter-like operations tomb.counting and tomb.analysis use:
+ get(), update(), most_common(), total(), normalize() and iteration (over non-zero entries only).
+
+Counts are stored as unsigned integers. A normalized table shares the counts of the table it came from,
+ and divides by the total on lookup, so normalizing is O(1) and costs no extra memory.
+ Values of a normalized table are identical to those produced by tomb.counting.normalize().
+
+Tables pickle compactly: arrays pickle as raw machine values, and the keys of a SparseTable
+ are packed into a single string.
+
+Tables can also be backed by read-only memoryviews (e.g. of an mmap'd model file, see tomb.language.modelfile),
+ with SparseTable keys in a PackedKeys sequence, which decodes keys on access. Such tables cost nothing to open,
+ but cannot be modified.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any, Optional, Union
+
+
+class FreqTable(Mapping):
+    """
+    Base class for the compact frequency tables.
+
+    Subclasses map between keys and codes (indices into self.counts).
+    """
+
+    def __init__(self, counts: Union[array, memoryview], total: Optional[float] = None):
+        self.counts = counts
+        # If not None, values are normalized: counts / total.
+        self.divisor = total
+
+    # Subclass interface.
+
+    def code(self, key: Any) -> Optional[int]:
+        raise NotImplementedError
+
+    def key(self, code: int) -> Any:
+        raise NotImplementedError
+
+    def _with_counts(self, counts: array, total: Optional[float]) -> FreqTable:
+        raise NotImplementedError
+
+    # Mapping interface.
+
+    def __getitem__(self, key: Any) -> Union[int, float]:
+        code = self.code(key)
+        if code is None or not self.counts[code]:
+            raise KeyError(key)
+        if self.divisor is None:
+            return self.counts[code]
+        return self.counts[code] / self.divisor
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        code = self.code(key)
+        if code is None:
+            return default
+        n = self.counts[code]
+        if not n:
+            return default
+        if self.divisor is None:
+            return n
+        return n / self.divisor
+
+    def __contains__(self, key: Any) -> bool:
+        code = self.code(key)
+        return code is not None and bool(self.counts[code])
+
+    def __iter__(self) -> Iterator[Any]:
+        for code, n in enumerate(self.counts):
+            if n:
+                yield self.key(code)
+
+    def __len__(self) -> int:
+        counts = self.counts
+        if isinstance(counts, memoryview):
+            counts = counts.tolist()
+        return len(counts) - counts.count(0)
+
+    def items(self) -> Iterator[tuple[Any, Union[int, float]]]:
+        d = self.divisor
+        for code, n in enumerate(self.counts):
+            if n:
+                yield self.key(code), (n if d is None else n / d)
+
+    def values(self) -> Iterator[Union[int, float]]:
+        d = self.divisor
+        return (n if d is None else n / d for n in self.counts if n)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return len(self) == len(other) and all(other.get(key) == value for key, value in self.items())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.most_common(8))!r}, ... {len(self)} entries)"
+
+    def align(self, dist: Mapping[Any, float]) -> dict[int, float]:
+        """
+        Align another distribution to this table's index: returns {code: value} for its keys that this table has.
+         (Keys it doesn't have could only pair with zeros in this table, so they're left out, and score 0.
+         That includes keys dropped by prune(): they don't score against the other_key() entry.)
+        """
+        code = self.code
+        aligned = {}
+        for key, value in dist.items():
+            i = code(key)
+            if i is not None:
+                aligned[i] = value
+        return aligned
+
+    def roots(self) -> array:
+        """
+        Square roots of the (normalized) values, aligned to the table's index, computed once and kept,
+         for bhattacharyya_coefficient_batch().
+        """
+        roots = self.__dict__.get("_roots")
+        if roots is None:
+            d = self.divisor if self.divisor is not None else (sum(self.counts) or 1)
+            roots = self._roots = array("d", (math.sqrt(n / d) for n in self.counts))
+        return roots
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the table: the counts, plus the keys, if they're stored.
+        """
+        return len(self.counts) * self.counts.itemsize + self._keys_nbytes()
+
+    def _keys_nbytes(self) -> int:
+        return 0
+
+    # Counter-like operations.
+
+    def total(self) -> Union[int, float]:
+        return sum(self.values())
+
+    def most_common(self, n: Optional[int] = None) -> list[tuple[Any, Union[int, float]]]:
+        if n is None:
+            return sorted(self.items(), key=lambda kv: kv[1], reverse=True)
+        return heapq.nlargest(n, self.items(), key=lambda kv: kv[1])
+
+    def normalize(self) -> FreqTable:
+        """
+        Returns this table as a probability distribution: the raw counts, and their total as the divisor.
+
+        Read-only (memory-mapped) counts are shared. A mutable table's counts (and keys) are copied, so that
+         changes to it don't put the distribution out of step with its divisor.
+        """
+        if self.divisor is not None:
+            return self
+        if isinstance(self.counts, memoryview):
+            return self._with_counts(self.counts, sum(self.counts))
+        tab = self.copy()
+        tab.divisor = sum(tab.counts)
+        return tab
+
+    def copy(self) -> FreqTable:
+        """
+        Returns a mutable copy of the raw counts, e.g. of a normalized (or memory-mapped) table, to add to.
+        """
+        return self._with_counts(_as_array(self.counts, copy=True), None)
+
+    def prune(self, top_n: Optional[int] = None, cumulative: Optional[float] = None) -> SparseTable:
+        """
+        Returns a table of only the most common entries: at most top_n of them, and no more than it takes
+         to reach cumulative (a fraction, e.g. 0.99) of the total.
+
+        The total of the dropped entries is kept under other_key() (e.g. "" for str keys), so a normalized table
+         stays normalized, and keeps its divisor. That entry only keeps the table normalized: it's never
+         a key of any text, so dropped keys score 0, like keys that were never counted.
+         (Crediting unknown keys with the tail mass would credit gibberish as much as rare words.)
+        """
+        entries = sorted(((n, code) for code, n in enumerate(self.counts) if n), reverse=True)
+        total = sum(n for n, _ in entries)
+        keep = len(entries)
+        if top_n is not None:
+            keep = min(keep, top_n)
+        if cumulative is not None:
+            target = cumulative * total
+            running = 0
+            for i, (n, _) in enumerate(entries):
+                running += n
+                if running >= target:
+                    keep = min(keep, i + 1)
+                    break
+
+        kept = {self.key(code): n for n, code in entries[:keep]}
+        if keep < len(entries):
+            kept[other_key(self.key(entries[0][1]))] = total - sum(kept.values())
+        keys = sorted(kept)
+        typecode = self.counts.typecode if isinstance(self.counts, array) else self.counts.format
+        try:
+            counts = array(typecode, map(kept.get, keys))
+        except OverflowError:
+            counts = array("Q", map(kept.get, keys))
+        return SparseTable(keys, counts, self.divisor)
+
+    def map(self, func: Callable[[float], float]) -> FreqTable:
+        """
+        Returns a new table of floats, func applied to each (non-zero) value, e.g. table.map(math.sqrt).
+        """
+        d = self.divisor
+        values = array("d", (func(n if d is None else n / d) if n else 0.0 for n in self.counts))
+        return self._with_counts(values, None)
+
+    def __setitem__(self, key: Any, n: int):
+        if self.divisor is not None:
+            raise TypeError("normalized tables are read-only.")
+        if isinstance(self.counts, memoryview):
+            raise TypeError("memory-mapped tables are read-only.")
+        self._changed()
+        code = self.code(key)
+        if code is None:
+            code = self._insert(key)
+        try:
+            self.counts[code] = n
+        except OverflowError:
+            # Widen, rather than lose counts. (4-byte counts are plenty for most corpora.)
+            self.counts = array("Q", self.counts)
+            self.counts[code] = n
+
+    def __delitem__(self, key: Any):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = 0
+
+    def _insert(self, key: Any) -> int:
+        raise KeyError(key)
+
+    def _changed(self):
+        # Called before counts (or keys) change: anything derived from them is stale.
+        self.__dict__.pop("_roots", None)
+
+    def update(self, other: Union[Mapping[Any, int], Iterable[Any]] = ()):
+        """
+        Add counts, like Counter.update(): other is either a mapping of counts, or an iterable of keys.
+        """
+        if isinstance(other, Mapping):
+            for key, n in other.items():
+                self[key] = self.get(key, 0) + n
+        else:
+            for key in other:
+                self[key] = self.get(key, 0) + 1
+
+
+def other_key(key: Any) -> Any:
+    """
+    The key pruned tables keep the total of their dropped entries under, for a table with keys like key:
+     "" for str, b"" for bytes, -1 for int (none of which is ever counted).
+    """
+    if isinstance(key, int):
+        return -1
+    return type(key)()
+
+
+class DenseTable(FreqTable):
+    """
+    Frequency table of N-grams over a fixed alphabet.
+
+    Keys are str (or bytes, for a bytes alphabet) of length n, every character in the alphabet.
+     Anything else is simply not in the table, and cannot be added to it.
+    """
+
+    def __init__(self, alphabet: Union[str, bytes], n: int, counts: Optional[array] = None, total: Optional[float] = None):
+        self.alphabet = alphabet
+        self.n = n
+        self.radix = len(alphabet)
+        # Iterating over bytes produces ints, so this works for both str and bytes keys.
+        self.index = {c: i for i, c in enumerate(alphabet)}
+        if counts is None:
+            counts = array("I", bytes(4 * self.radix ** n))
+        super().__init__(counts, total)
+
+    @staticmethod
+    def from_counts(counts: Mapping[Any, int], alphabet: Union[str, bytes], n: int) -> DenseTable:
+        tab = DenseTable(alphabet, n)
+        tab.update(counts)
+        return tab
+
+    def code(self, key: Any) -> Optional[int]:
+        if not isinstance(key, (str, bytes)) or len(key) != self.n:
+            return None
+        index = self.index
+        code = 0
+        for c in key:
+            i = index.get(c)
+            if i is None:
+                return None
+            code = code * self.radix + i
+        return code
+
+    def key(self, code: int) -> Union[str, bytes]:
+        chars = []
+        for _ in range(0, self.n):
+            code, i = divmod(code, self.radix)
+            chars.append(self.alphabet[i:i+1])
+        return self.alphabet[:0].join(reversed(chars))
+
+    def _with_counts(self, counts: array, total: Optional[float]) -> DenseTable:
+        tab = DenseTable.__new__(DenseTable)
+        tab.alphabet, tab.n, tab.radix, tab.index = self.alphabet, self.n, self.radix, self.index
+        FreqTable.__init__(tab, counts, total)
+        return tab
+
+    def __reduce__(self):
+        return DenseTable, (self.alphabet, self.n, _as_array(self.counts), self.divisor)
+
+
+class SparseTable(FreqTable):
+    """
+    Frequency table of arbitrary (but mutually comparable) keys, e.g. words or characters.
+
+    Keys are kept in a sorted list, values in a parallel array. Lookups are O(log n).
+     Adding new keys is O(n), so build tables from a Counter with from_counts() rather than key by key.
+    """
+
+    def __init__(
+        self,
+        keys: Optional[Sequence[Any]] = None,
+        counts: Union[array, memoryview, None] = None,
+        total: Optional[float] = None
+    ):
+        if keys is None:
+            keys = []
+        if counts is None:
+            counts = array("I", bytes(4 * len(keys)))
+        self.sorted_keys = keys
+        super().__init__(counts, total)
+
+    @staticmethod
+    def from_counts(counts: Mapping[Any, int]) -> SparseTable:
+        keys = sorted(key for key, n in counts.items() if n)
+        try:
+            values = array("I", (counts[key] for key in keys))
+        except OverflowError:
+            values = array("Q", (counts[key] for key in keys))
+        return SparseTable(keys, values)
+
+    def code(self, key: Any) -> Optional[int]:
+        keys = self.sorted_keys
+        if keys.__class__ is PackedKeys:
+            # Bisecting packed keys means decoding keys on every step, so unpack them on first use.
+            keys = self.sorted_keys = keys.unpack()
+        try:
+            i = bisect_left(keys, key)
+        except TypeError:
+            # Not comparable with our keys, so it can't be one of them.
+            return None
+        if i < len(keys) and keys[i] == key:
+            return i
+        return None
+
+    def key(self, code: int) -> Any:
+        keys = self.sorted_keys
+        if keys.__class__ is PackedKeys:
+            keys = self.sorted_keys = keys.unpack()
+        return keys[code]
+
+    def _insert(self, key: Any) -> int:
+        i = bisect_left(self.sorted_keys, key)
+        self.sorted_keys.insert(i, key)
+        self.counts.insert(i, 0)
+        return i
+
+    def update(self, other: Union[Mapping[Any, int], Iterable[Any]] = ()):
+        # Merge in one go, rather than inserting new keys one by one.
+        merged = dict(self.items())
+        if isinstance(other, Mapping):
+            for key, n in other.items():
+                merged[key] = merged.get(key, 0) + n
+        else:
+            for key in other:
+                merged[key] = merged.get(key, 0) + 1
+        tab = SparseTable.from_counts(merged)
+        self._changed()
+        self.sorted_keys, self.counts = tab.sorted_keys, tab.counts
+
+    def _with_counts(self, counts: array, total: Optional[float]) -> SparseTable:
+        return SparseTable(self.sorted_keys, counts, total)
+
+    def copy(self) -> SparseTable:
+        return SparseTable(list(self.sorted_keys), _as_array(self.counts, copy=True))
+
+    def _keys_nbytes(self) -> int:
+        keys = self.sorted_keys
+        if isinstance(keys, PackedKeys):
+            return len(keys.blob) + len(keys.offsets) * keys.offsets.itemsize
+        if isinstance(keys, memoryview):
+            return keys.nbytes
+        return sys.getsizeof(keys) + sum(map(sys.getsizeof, keys))
+
+    def __reduce__(self):
+        return _unpack_sparse, (_pack_keys(self.sorted_keys), _as_array(self.counts), self.divisor)
+
+
+class PackedKeys(Sequence):
+    """
+    A read-only sorted key list, stored as one blob (UTF-8 for str keys) and an array of offsets into it:
+     key i is blob[offsets[i]:offsets[i+1]]. Keys are only decoded when accessed.
+
+    SparseTable unpacks these into a list on first use; until then, opening a table costs nothing.
+    """
+
+    def __init__(self, blob: Union[bytes, memoryview], offsets: Union[array, memoryview], text: bool):
+        self.blob = blob
+        self.offsets = offsets
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Union[str, bytes]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("key index out of range")
+        key = bytes(self.blob[self.offsets[i]:self.offsets[i+1]])
+        return key.decode("utf-8") if self.text else key
+
+    def unpack(self) -> list[Union[str, bytes]]:
+        blob = bytes(self.blob)
+        offsets = self.offsets.tolist()
+        keys = [blob[i:j] for i, j in zip(offsets, offsets[1:])]
+        if self.text:
+            return [key.decode("utf-8") for key in keys]
+        return keys
+
+
+def _as_array(counts: Union[array, memoryview], copy: bool = False) -> array:
+    # memoryviews don't pickle.
+    if isinstance(counts, memoryview):
+        return array(counts.format, counts)
+    return array(counts.typecode, counts) if copy else counts
+
+
+# SparseTable keys are pickled as one long str (or bytes) plus an array of lengths,
+#  or as an array, if they're ints. This is much smaller, and faster to load, than a pickled list.
+
+def _pack_keys(keys: Sequence[Any]) -> tuple[str, Any, Optional[array]]:
+    if keys and isinstance(keys[0], int):
+        return "int", array("q", keys), None
+    if isinstance(keys, PackedKeys):
+        keys = list(keys)
+    lengths = array("I", map(len, keys))
+    if max(lengths, default=0) < 256:
+        lengths = array("B", lengths)
+    if keys and isinstance(keys[0], bytes):
+        return "bytes", b"".join(keys), lengths
+    return "str", "".join(keys), lengths
+
+
+def _unpack_keys(packed: tuple[str, Any, Optional[array]]) -> list[Any]:
+    kind, blob, lengths = packed
+    if kind == "int":
+        return blob.tolist()
+    keys = []
+    pos = 0
+    for n in lengths:
+        keys.append(blob[pos:pos+n])
+        pos += n
+    return keys
+
+
+def _unpack_sparse(packed: tuple[str, Any, Optional[array]], counts: array, total: Optional[float]) -> SparseTable:
+    return SparseTable(_unpack_keys(packed), counts, total)
@@ -1,5 +1,8 @@
 import math
-from typing import Any, Union
+import operator
+from array import array
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any, Optional, Union
 
 
 def bhattacharyya_coefficient(p: dict[Any, float], q: dict[Any, float]) -> float:
@@ -18,6 +21,47 @@ def bhattacharyya_coefficient(p: dict[Any, float], q: dict[Any, float]) -> float
     return sum(math.sqrt(p.get(key, 0.0) * q.get(key, 0.0)) for key in p.keys() | q.keys())
 
 
+def bhattacharyya_coefficient_aligned(p: Sequence[float], q: Sequence[float]) -> float:
+    """
+    Returns the Bhattacharyya coefficient for two distributions aligned to the same index,
+     i.e. p[i] and q[i] are the probabilities of the same outcome (e.g. two arrays of N-gram probabilities).
+
+    No keys are hashed or merged, so this is much cheaper than bhattacharyya_coefficient().
+    """
+    return sum(map(math.sqrt, map(operator.mul, p, q)))
+
+
+def bhattacharyya_coefficient_batch(
+    q: Optional[Sequence[float]],
+    ps: Iterable[Union[Sequence[float], Mapping[int, float]]],
+    q_roots: Optional[Sequence[float]] = None
+) -> list[float]:
+    """
+    Returns the Bhattacharyya coefficient of each of the distributions ps against one reference distribution q,
+     all aligned to the same index (see bhattacharyya_coefficient_aligned()).
+
+    The square roots of q are computed once (or passed in as q_roots, in which case q is not used),
+     after which each coefficient is a dot product:
+
+                      n  __  __
+        BC(pⱼ,q) =    ∑ √pⱼᵢ √qᵢ
+                     i=1
+
+    A row of ps is either a sequence (a dense row), or a mapping of index to probability (a sparse row,
+     for distributions with few non-zero entries, e.g. that of a short text against an N-gram model).
+    """
+    if q_roots is None:
+        q_roots = array("d", map(math.sqrt, q))
+
+    bcs = []
+    for p in ps:
+        if isinstance(p, Mapping):
+            bcs.append(sum(math.sqrt(v) * q_roots[i] for i, v in p.items()))
+        else:
+            bcs.append(sum(map(operator.mul, map(math.sqrt, p), q_roots)))
+    return bcs
+
+
 # XXX: Remove in Python 3.10 - use int.bit_count instead.
 _popcount_tbl = {b: bin(b).count("1") for b in range(0, 256)}
 
@@ -1,28 +1,54 @@
 from __future__ import annotations
 
+import math
+import re
+from array import array
 from collections import Counter
-from typing import Any, NamedTuple
+from collections.abc import Mapping, MutableMapping
+from typing import Any, NamedTuple, Optional, Union
 
-from ..counting import freq, word_freq, count_ngrams, normalize
+from ..counting import Textish, count_run_ngrams, normalize
+from ..freqtable import DenseTable, SparseTable
 
 
+# Tables are dicts/Counters when analysing a candidate text,
+#  and compact FreqTables (see LanguageModelData.compact()) in the stored reference models.
+
 class LanguageModel(NamedTuple):
-    char: dict[Any, float]
-    word: dict[Any, float]
-    bigram: dict[Any, float]
-    trigram: dict[Any, float]
+    char: Mapping[Any, float]
+    word: Mapping[Any, float]
+    bigram: Mapping[Any, float]
+    trigram: Mapping[Any, float]
 
 
 class LanguageModelData(NamedTuple):
-    char: Counter[Any]
-    word: Counter[Any]
-    bigram: Counter[Any]
-    trigram: Counter[Any]
+    char: MutableMapping[Any, int]
+    word: MutableMapping[Any, int]
+    bigram: MutableMapping[Any, int]
+    trigram: MutableMapping[Any, int]
 
     @staticmethod
     def new() -> LanguageModelData:
         return LanguageModelData(Counter(), Counter(), Counter(), Counter())
 
+    def update(self, other: LanguageModelData) -> LanguageModelData:
+        """Add the counts of another LanguageModelData to this one."""
+        for mine, theirs in zip(self, other):
+            mine.update(theirs)
+        return self
+
+    def compact(self, alphabet: Textish = "abcdefghijklmnopqrstuvwxyz") -> LanguageModelData:
+        """
+        Convert to array-backed tables: sparse for characters and words, dense over the alphabet for n-grams.
+        Use b"abcdefghijklmnopqrstuvwxyz" for the byte model.
+        """
+        return LanguageModelData(
+            SparseTable.from_counts(self.char),
+            SparseTable.from_counts(self.word),
+            DenseTable.from_counts(self.bigram, alphabet, 2),
+            DenseTable.from_counts(self.trigram, alphabet, 3),
+        )
+
     def normalize(self) -> LanguageModel:
         return LanguageModel(
             normalize(self.char),
@@ -32,17 +58,152 @@ class LanguageModelData(NamedTuple):
         )
 
 
+PruneLimit = Union[None, int, float, Mapping[str, Union[int, float]]]
+
+
+def prune_model(model: LanguageModel, top_n: PruneLimit = None, cumulative: PruneLimit = None) -> LanguageModel:
+    """
+    Prune each table of a model of FreqTables to its most common entries, see FreqTable.prune().
+
+    top_n and cumulative apply to every table, or are mappings of table name to limit,
+     e.g. top_n={"word": 5000} prunes only the word table.
+    """
+    def limit(option: PruneLimit, name: str) -> Union[None, int, float]:
+        return option.get(name) if isinstance(option, Mapping) else option
+
+    tabs = []
+    for name, tab in zip(model._fields, model):
+        n, c = limit(top_n, name), limit(cumulative, name)
+        tabs.append(tab if n is None and c is None else tab.prune(n, c))
+    return type(model)(*tabs)
+
+
+# Fused tokenization.
+#
+# Words are runs of [a-z-] in the lowercased text (less leading hyphens),
+#  and bigrams/trigrams are counted over runs of [a-z], i.e. hyphens break n-grams too.
+# So a single regex scan for [a-z-]+ yields the words, and splitting those on "-" yields the n-gram runs.
+# Everything else is done by C-level str methods and Counter.update().
+#
+# The resulting counts are identical to using freq(), word_freq() and count_ngrams() directly
+#  with their default alphabets.
+
+_word_token = re.compile("[a-z-]+")
+_word_token_bytes = re.compile(b"[a-z-]+")
+
+
+def _analyse_tokens(tokens: list[Textish], hyphen: Textish, lmd: LanguageModelData):
+    lmd.word.update(w for w in (t.lstrip(hyphen) for t in tokens) if w)
+
+    # bigram / trigram
+    runs = [run for t in tokens for run in t.split(hyphen) if len(run) > 1]
+    count_run_ngrams(runs, 2, lmd.bigram)
+    count_run_ngrams(runs, 3, lmd.trigram)
+
+
 def analyse_language(text: str, lmd: Optional[LanguageModelData] = None) -> LanguageModelData:
     if lmd is None:
         lmd = LanguageModelData.new()
 
-    freq(text, lmd.char)
+    lmd.char.update(text)
+    _analyse_tokens(_word_token.findall(text.lower()), "-", lmd)
 
-    text = text.lower()
-    word_freq(text, lmd.word)
+    return lmd
 
-    # bigram / trigram
-    count_ngrams(text, 2, lmd.bigram)
-    count_ngrams(text, 3, lmd.trigram)
+
+# The byte model is built from raw (UTF-8) bytes rather than decoded text.
+# Characters become byte values (ints), and words and n-grams are bytes,
+#  only ASCII letters are lowercased.
+
+
+def analyse_language_bytes(data: bytes, lmd: Optional[LanguageModelData] = None) -> LanguageModelData:
+    if lmd is None:
+        lmd = LanguageModelData.new()
+
+    lmd.char.update(data)
+    _analyse_tokens(_word_token_bytes.findall(bytes(data).lower()), b"-", lmd)
 
     return lmd
+
+
+# Quadgram fitness.
+#
+# The classic fitness function for hill-climbing attacks on classical ciphers:
+#  the sum of the log-probabilities of every quadgram in a text.
+#  Unlike a Bhattacharyya coefficient, this is additive, so changing a single letter only
+#  changes the (up to four) quadgrams covering it, and the score can be updated in O(1).
+#
+# Only the letters a-z are considered, everything else is stripped and case is ignored.
+# Letters are coded as 0..25, and a quadgram abcd is found at index ((a×26 + b)×26 + c)×26 + d.
+
+QUADGRAM_SPACE = 26 ** 4
+
+_letter_codes = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", bytes(range(0, 26)))
+
+
+def letter_codes(text: Textish) -> bytes:
+    """
+    Lowercase, strip everything but the letters a-z, then code each letter as 0..25.
+    """
+    if isinstance(text, str):
+        text = re.sub("[^a-z]+", "", text.lower()).encode("ascii")
+    else:
+        text = re.sub(b"[^a-z]+", b"", bytes(text).lower())
+    return text.translate(_letter_codes)
+
+
+class QuadgramModel(NamedTuple):
+    # log₁₀ probability of each quadgram, indexed by base-26 code.
+    # Quadgrams never seen in the corpus are given a floor probability.
+    logp: array
+
+    @staticmethod
+    def from_counts(counts: Counter[str], floor: float = 0.01) -> QuadgramModel:
+        """
+        Build a model from quadgram counts (e.g. from count_ngrams(..., 4)).
+        Unseen quadgrams are treated as having been seen 'floor' times.
+        """
+        total = sum(counts.values())
+        logp = array("d", [math.log10(floor / total)]) * QUADGRAM_SPACE
+        for gram, n in counts.items():
+            a, b, c, d = letter_codes(gram)
+            logp[((a * 26 + b) * 26 + c) * 26 + d] = math.log10(n / total)
+        return QuadgramModel(logp)
+
+    def score_codes(self, codes: bytes) -> float:
+        """
+        Fitness of a sequence of letter codes (see letter_codes()), in O(n).
+        """
+        logp = self.logp
+        score = 0.0
+        idx = 0
+        for i, c in enumerate(codes):
+            idx = (idx * 26 + c) % QUADGRAM_SPACE
+            if i >= 3:
+                score += logp[idx]
+        return score
+
+    def fitness(self, text: Textish) -> float:
+        """
+        Fitness of some text: the sum of log₁₀ probabilities of every quadgram in it.
+        Higher (closer to zero) is more English.
+        """
+        return self.score_codes(letter_codes(text))
+
+    def rescore(self, codes: Union[bytes, bytearray], score: float, idx: int, new: int) -> float:
+        """
+        Returns the fitness of codes if codes[idx] were replaced by new, given its current fitness, in O(1).
+
+        codes is not modified, so a hill-climber can decide whether to keep the change.
+        """
+        logp = self.logp
+        old = codes[idx]
+        for start in range(max(0, idx - 3), min(idx, len(codes) - 4) + 1):
+            q = 0
+            r = 0
+            for pos in range(start, start + 4):
+                c = codes[pos]
+                q = q * 26 + c
+                r = r * 26 + (new if pos == idx else c)
+            score += logp[r] - logp[q]
+        return score
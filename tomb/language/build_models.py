@@ -0,0 +1,37 @@
+"""
+Build the prebuilt model files shipped in tomb.language.data, e.g. before packaging:
+
+    python3 -m tomb.language.build_models [lang ...]
+
+Models are always generated from the corpus (never taken from the cache), and written with
+ the current tables.MODEL_FORMAT and the hash of their inputs. The loaders ignore a model file
+ if either doesn't match, so rebuild them whenever the corpus, the analysis or MODEL_FORMAT changes.
+"""
+
+import sys
+
+from .modelfile import write_model
+from .tables import (
+    MODEL_FORMAT,
+    generate_byte_language_model,
+    generate_language_model,
+    language_model_name,
+    model_file_path,
+    model_source,
+)
+
+
+def build_models(lang: str):
+    for binary, generate in ((False, generate_language_model), (True, generate_byte_language_model)):
+        source = model_source(language_model_name(lang, binary))
+        write_model(model_file_path(lang, binary), generate(lang), MODEL_FORMAT, source)
+
+
+def main(argv: list[str]):
+    for lang in argv or ["english"]:
+        print(f"Building {lang} models...")
+        build_models(lang)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
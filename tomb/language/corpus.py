@@ -0,0 +1,181 @@
+"""
+Map-reduce analysis of text corpora.
+
+Building a model means analysing a lot of text, and analysis of one piece of text is independent of any other,
+ so corpus files (or large chunks of them) are analysed in worker processes (map), and the resulting
+ LanguageModelData counters are summed (reduce).
+
+Large files are streamed rather than read whole, and chunks are only ever split just after whitespace.
+ Whitespace is never part of a word or n-gram, so the merged counts are exactly those of analysing each file whole.
+"""
+
+import lzma
+import multiprocessing
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional, Union
+
+from . import LanguageModelData, analyse_language, analyse_language_bytes
+
+Text = Union[str, bytes]
+Path = Union[str, os.PathLike]
+
+
+def read_corpus_file(path: Path, binary: bool = False) -> Text:
+    """
+    Read a corpus file, decompressing .lzma/.xz files, and strip leading/trailing whitespace.
+    Text files are read as UTF-8.
+    """
+    mode = "rb" if binary else "rt"
+    if os.fspath(path).endswith((".lzma", ".xz")):
+        with lzma.open(path, mode, encoding=None if binary else "utf-8") as f:
+            return f.read().strip()
+    with open(path, mode, encoding=None if binary else "utf-8") as f:
+        return f.read().strip()
+
+
+def read_corpus_chunks(path: Path, binary: bool = False, chunk_size: int = 1 << 20) -> Iterator[Text]:
+    """
+    Read a corpus file (decompressing .lzma/.xz files) in chunks of chunk_size characters, without stripping.
+    """
+    mode = "rb" if binary else "rt"
+    opener = lzma.open if os.fspath(path).endswith((".lzma", ".xz")) else open
+    with opener(path, mode, encoding=None if binary else "utf-8") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def whitespace_chunks(chunks: Iterable[Text], size: int = 0) -> Iterator[Text]:
+    """
+    Re-chunk a stream of text so that every chunk (except the last) ends just after whitespace.
+
+    Chunks are at least size characters (if the text lasts that long). Leading and trailing whitespace of the
+     whole stream is dropped, so the chunks join up to "".join(chunks).strip().
+
+    Only the text since the last whitespace is carried from one chunk to the next,
+     so memory use is bounded by the chunk size and the longest run of non-whitespace.
+    """
+    # Chunks since the last split are collected, and only joined once there are at least size characters
+    #  (joining on every chunk would copy the buffer again for each small chunk).
+    pieces = []
+    length = 0
+    # Whether whitespace has arrived since the last look for a split point.
+    #  Without it, the buffer is still one word, and joining it again would find nothing new.
+    spaced = True
+    for chunk in chunks:
+        if not pieces:
+            # Still in leading whitespace (or empty chunks).
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+        pieces.append(chunk)
+        length += len(chunk)
+        if not spaced:
+            spaced = chunk.strip() != chunk or len(chunk.split(None, 1)) > 1
+        if length < size or not spaced:
+            continue
+
+        buf = chunk[:0].join(pieces)
+        # Hold back trailing whitespace (it may be the end of the stream) and the last word (it may continue).
+        end = len(buf.rstrip())
+        parts = buf[:end].rsplit(None, 1)
+        # What's held back is a single word, so only trailing whitespace lets the next chunk make a split point.
+        spaced = end < len(buf)
+        if len(parts) < 2:
+            pieces = [buf]
+            continue
+        split = end - len(parts[1])
+        yield buf[:split]
+        carry = buf[split:]
+        pieces, length = [carry], len(carry)
+
+    if pieces:
+        carry = pieces[0][:0].join(pieces).rstrip()
+        if carry:
+            yield carry
+
+
+def analyse_text(text: Text, lmd: Optional[LanguageModelData] = None) -> LanguageModelData:
+    """Analyse str with analyse_language(), bytes with analyse_language_bytes()."""
+    if isinstance(text, (bytes, bytearray)):
+        return analyse_language_bytes(text, lmd)
+    return analyse_language(text, lmd)
+
+
+def merge_language_data(parts: Iterable[LanguageModelData], into: Optional[LanguageModelData] = None) -> LanguageModelData:
+    """
+    The reduce step: sum the counts of several LanguageModelData.
+    """
+    if into is None:
+        into = LanguageModelData.new()
+    for part in parts:
+        into.update(part)
+    return into
+
+
+def _analyse_file(path: Path, binary: bool) -> LanguageModelData:
+    return analyse_text(read_corpus_file(path, binary))
+
+
+def analyse_stream(chunks: Iterable[Text], lmd: Optional[LanguageModelData] = None) -> LanguageModelData:
+    """
+    Analyse a stream of text (an iterable of str, or of bytes), e.g. chunks of a file, lines of a log,
+     or rows from a database cursor, without ever holding all of it in memory.
+
+    The counts are exactly those of analysing "".join(chunks).strip() in one go:
+     words and n-grams spanning chunk boundaries are carried over.
+    """
+    if lmd is None:
+        lmd = LanguageModelData.new()
+    for chunk in whitespace_chunks(chunks, 1 << 16):
+        analyse_text(chunk, lmd)
+    return lmd
+
+
+def _corpus_tasks(paths: Iterable[Path], binary: bool, chunk_size: int) -> Iterator[tuple]:
+    # Small files are read by the worker, large files are streamed here and handed out in chunks.
+    for path in paths:
+        if os.path.getsize(path) * 4 <= chunk_size:
+            yield _analyse_file, path, binary
+        else:
+            for chunk in whitespace_chunks(read_corpus_chunks(path, binary, min(chunk_size, 1 << 20)), chunk_size):
+                yield analyse_text, chunk
+
+
+def analyse_corpus(
+    paths: Iterable[Path],
+    binary: bool = False,
+    processes: Optional[int] = None,
+    chunk_size: int = 1 << 22
+) -> LanguageModelData:
+    """
+    Analyse a collection of corpus files (plain UTF-8 text, or .lzma/.xz compressed) in a pool of worker processes.
+
+    Files that are (probably) larger than chunk_size characters once decompressed are streamed, and handed out
+     in chunks, so a single large file is spread across workers too, and is never held in memory whole.
+     At most two tasks per worker are in flight at once.
+
+    binary selects the byte model analysis (see analyse_language_bytes()).
+    processes defaults to one per CPU. With processes=1, or when called from within a worker process,
+     everything happens in this process.
+
+    Returns the merged (unnormalized) counts.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    tasks = _corpus_tasks(paths, binary, chunk_size)
+
+    if processes == 1 or multiprocessing.parent_process() is not None:
+        return merge_language_data(func(*args) for func, *args in tasks)
+
+    mdat = LanguageModelData.new()
+    with ProcessPoolExecutor(processes) as pool:
+        pending = set()
+        for func, *args in tasks:
+            if len(pending) >= 2 * processes:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                merge_language_data((fut.result() for fut in done), mdat)
+            pending.add(pool.submit(func, *args))
+        merge_language_data((fut.result() for fut in pending), mdat)
+    return mdat
@@ -0,0 +1,187 @@
+"""
+Binary language model files.
+
+A model file holds the four tables of a compact LanguageModel (see LanguageModelData.compact()) as packed arrays,
+ laid out so that they can be used in place: open_model() maps the file into memory and wraps each section
+ in a memoryview, so opening a model costs the same whatever its size, nothing is unpacked until it's looked up,
+ and every process that opens the same file shares one copy of it (in the page cache).
+
+Layout (all integers little-endian, sections 8-byte aligned):
+
+ - Header: magic b"TOMBLM", file format version (u16), model version (u32, see tables.MODEL_FORMAT),
+    the number of tables (u32), and the source of the model (16 bytes, ASCII, NUL-padded): the hash of
+    its inputs, as in tables.model_cache_name().
+ - One table descriptor per table: see _TABLE below.
+ - The sections the descriptors point to:
+    DenseTable: the alphabet, and the counts.
+    SparseTable: the keys (UTF-8 or raw bytes blob plus u32 offsets, or i64 for int keys), and the counts.
+
+Files are written at build time by tomb.language.build_models, and shipped in tomb.language.data.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Optional, Union
+
+from ..freqtable import DenseTable, FreqTable, PackedKeys, SparseTable
+from . import LanguageModel
+
+MAGIC = b"TOMBLM"
+# Bumped when the layout changes.
+FILE_FORMAT = 2
+
+_HEADER = struct.Struct("<6sHII16s")
+# kind, key kind, counts typecode, normalized, n (for dense tables), total,
+#  then (offset, length) in bytes of: alphabet or key blob, key offsets, counts.
+_TABLE = struct.Struct("<BBcBId6Q")
+
+_DENSE, _SPARSE = 0, 1
+_STR_KEYS, _BYTES_KEYS, _INT_KEYS = 0, 1, 2
+
+Path = Union[str, os.PathLike]
+
+
+class ModelFileError(Exception):
+    pass
+
+
+def _le(arr: array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _key_sections(tab: FreqTable) -> tuple[int, bytes, bytes]:
+    if isinstance(tab, DenseTable):
+        if isinstance(tab.alphabet, str):
+            return _STR_KEYS, tab.alphabet.encode("utf-8"), b""
+        return _BYTES_KEYS, bytes(tab.alphabet), b""
+
+    keys = list(tab.sorted_keys)
+    if keys and isinstance(keys[0], int):
+        return _INT_KEYS, _le(array("q", keys)), b""
+    text = not keys or isinstance(keys[0], str)
+    encoded = [key.encode("utf-8") for key in keys] if text else keys
+    offsets = array("I", [0])
+    for key in encoded:
+        offsets.append(offsets[-1] + len(key))
+    return (_STR_KEYS if text else _BYTES_KEYS), b"".join(encoded), _le(offsets)
+
+
+def write_model(path: Path, lm: LanguageModel, model_version: int = 0, source: str = ""):
+    """
+    Write a LanguageModel of FreqTables (e.g. LanguageModelData.compact().normalize()) to a model file.
+
+    source identifies what the model was built from (at most 16 ASCII characters), see open_model().
+    """
+    source = source.encode("ascii")
+    if len(source) > 16:
+        raise ValueError("source must be at most 16 characters.")
+    tables = []
+    for tab in lm:
+        if not isinstance(tab, (DenseTable, SparseTable)):
+            raise TypeError(f"model files can only hold FreqTables, not {type(tab).__name__}.")
+        key_kind, blob, offsets = _key_sections(tab)
+        counts = tab.counts
+        if isinstance(counts, memoryview):
+            counts = array(counts.format, counts)
+        tables.append((tab, key_kind, [blob, offsets, _le(counts)]))
+
+    header_size = _HEADER.size + _TABLE.size * len(tables)
+    pos = header_size
+    out = [_HEADER.pack(MAGIC, FILE_FORMAT, model_version, len(tables), source)]
+    body = []
+    for tab, key_kind, sections in tables:
+        spans = []
+        for section in sections:
+            pad = -pos % 8
+            body.append(b"\0" * pad + section)
+            pos += pad
+            spans += [pos, len(section)]
+            pos += len(section)
+        dense = isinstance(tab, DenseTable)
+        out.append(_TABLE.pack(
+            _DENSE if dense else _SPARSE,
+            key_kind,
+            tab.counts.typecode.encode() if isinstance(tab.counts, array) else tab.counts.format.encode(),
+            tab.divisor is not None,
+            tab.n if dense else 0,
+            tab.divisor or 0.0,
+            *spans,
+        ))
+
+    # Write to a temporary file and rename, so a reader never sees a partial model.
+    tmp = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(b"".join(out + body))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _section(buf: memoryview, offset: int, length: int, typecode: Optional[str] = None) -> Union[memoryview, array]:
+    view = buf[offset:offset+length]
+    if typecode is None:
+        return view
+    if sys.byteorder != "little":
+        arr = array(typecode, view)
+        arr.byteswap()
+        return arr
+    return view.cast(typecode)
+
+
+def open_model(path: Path, model_version: Optional[int] = None, source: Optional[str] = None) -> LanguageModel:
+    """
+    Map a model file into memory, and return its (read-only) LanguageModel.
+
+    Raises ModelFileError if the file is not a model file, is of another format version,
+     or (if model_version or source are given) holds another version of the model, or one built from other inputs.
+    """
+    with open(path, "rb") as f:
+        try:
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except ValueError as err:
+            raise ModelFileError("Empty model file") from err
+
+    try:
+        magic, file_format, version, count, file_source = _HEADER.unpack_from(buf)
+    except struct.error as err:
+        raise ModelFileError("Truncated model file") from err
+    if magic != MAGIC:
+        raise ModelFileError("Not a model file")
+    if file_format != FILE_FORMAT:
+        raise ModelFileError(f"Unsupported model file format {file_format}")
+    if model_version is not None and version != model_version:
+        raise ModelFileError(f"Model file is version {version}, not {model_version}")
+    file_source = file_source.rstrip(b"\0").decode("ascii", "replace")
+    if source is not None and file_source != source:
+        raise ModelFileError(f"Model file was built from {file_source or 'unknown inputs'}, not {source}")
+
+    tables = []
+    for i in range(0, count):
+        kind, key_kind, typecode, normalized, n, total, *spans = _TABLE.unpack_from(buf, _HEADER.size + i * _TABLE.size)
+        if any(off + length > len(buf) for off, length in zip(spans[::2], spans[1::2])):
+            raise ModelFileError("Truncated model file")
+        blob_span, offsets_span, counts_span = spans[0:2], spans[2:4], spans[4:6]
+        counts = _section(buf, *counts_span, typecode.decode())
+        total = total if normalized else None
+
+        if kind == _DENSE:
+            alphabet = bytes(_section(buf, *blob_span))
+            if key_kind == _STR_KEYS:
+                alphabet = alphabet.decode("utf-8")
+            tables.append(DenseTable(alphabet, n, counts, total))
+        elif key_kind == _INT_KEYS:
+            tables.append(SparseTable(_section(buf, *blob_span, "q"), counts, total))
+        else:
+            keys = PackedKeys(_section(buf, *blob_span), _section(buf, *offsets_span, "I"), key_kind == _STR_KEYS)
+            tables.append(SparseTable(keys, counts, total))
+
+    return LanguageModel(*tables)
@@ -0,0 +1,104 @@
+"""
+Registry of language models: discovers the languages there is data for, loads models on demand,
+ and keeps the most recently used ones in memory, up to a memory budget.
+"""
+
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from importlib import resources
+from typing import Any
+
+from ..freqtable import FreqTable
+from . import data
+
+
+def available_languages() -> list[str]:
+    """
+    Languages with a corpus (.{lang}.lzma files) or a prebuilt model ({lang}.model) in tomb.language.data.
+    """
+    langs = set()
+    for f in resources.files(data).iterdir():
+        parts = f.name.split(".")
+        if len(parts) >= 3 and parts[-1] == "lzma":
+            langs.add(parts[-2])
+        elif len(parts) == 2 and parts[-1] == "model":
+            langs.add(parts[0])
+    return sorted(langs)
+
+
+def table_nbytes(tab: Mapping[Any, Any]) -> int:
+    """
+    Approximate memory used by a model table (a FreqTable, or a dict/Counter).
+    """
+    if isinstance(tab, FreqTable):
+        return tab.nbytes()
+    return sys.getsizeof(tab) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in tab.items())
+
+
+def model_nbytes(model: tuple[Mapping[Any, Any], ...]) -> int:
+    """
+    Approximate memory used by a model (a LanguageModel, or anything else that's a tuple of tables).
+    """
+    return sum(map(table_nbytes, model))
+
+
+class ModelRegistry:
+    """
+    A least recently used cache of models, bounded by their (approximate) total size in bytes.
+
+    Models are loaded by loader(key) on first use. When the total size exceeds max_bytes, the least
+     recently used models are evicted, though the most recently used model is always kept.
+
+    Keys are typically language names, but can be anything hashable, e.g. (lang, binary).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[Hashable], Any],
+        max_bytes: int = 64 << 20,
+        sizeof: Callable[[Any], int] = model_nbytes
+    ):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.models: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.nbytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.models
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def loaded(self) -> list[Hashable]:
+        """
+        Keys of the loaded models, least recently used first.
+        """
+        return list(self.models)
+
+    def get(self, key: Hashable) -> Any:
+        if key in self.models:
+            self.models.move_to_end(key)
+            return self.models[key][0]
+
+        model = self.loader(key)
+        size = self.sizeof(model)
+        self.loads += 1
+        self.models[key] = (model, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes and len(self.models) > 1:
+            _, (_, evicted) = self.models.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+        return model
+
+    def evict(self, key: Hashable):
+        _, size = self.models.pop(key)
+        self.nbytes -= size
+
+    def clear(self):
+        self.models.clear()
+        self.nbytes = 0
@@ -1,29 +1,260 @@
-import lzma
+import hashlib
+import os
+import re
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
 from importlib import resources
+from typing import Any, Optional, Union
 
-from .. import cache
+from .. import __version__, cache
+from ..counting import count_ngrams
 from . import data
-from . import LanguageModel, LanguageModelData, analyse_language
+from . import LanguageModel, QuadgramModel
+from .corpus import Path, analyse_corpus, analyse_text, read_corpus_file
+from .modelfile import ModelFileError, open_model
 
-def generate_language_model(lang: str) -> LanguageModel:
-    mdat = LanguageModelData.new()
 
-    for f in resources.contents(data):
-        if f.endswith(f".{lang}.lzma"):
-            with resources.open_binary(data, f) as src_b, lzma.open(src_b, "rt") as src_z:
-                text = src_z.read().strip()
-                analyse_language(text, mdat)
+def corpus_files(lang: str) -> list[str]:
+    """
+    Paths of the bundled .{lang}.lzma files.
+    """
+    root = resources.files(data)
+    return sorted(str(root / f.name) for f in root.iterdir() if f.name.endswith(f".{lang}.lzma"))
 
-    return mdat.normalize()
 
+def corpus_texts(lang: str, binary: bool = False) -> Iterator[Union[str, bytes]]:
+    """
+    Iterate over the (decompressed, stripped) contents of each bundled .{lang}.lzma file.
+    """
+    for path in corpus_files(lang):
+        yield read_corpus_file(path, binary)
 
-def load_language_model(lang: str) -> LanguageModel:
+
+# Bumped when the stored form of the models changes, so stale model files are not loaded.
+MODEL_FORMAT = 2
+
+
+def model_cache_name(kind: str, lang: str, **params: Any) -> str:
+    """
+    Cache entry name for a model generated from the lang corpus, e.g. "language-model-english-<hash>".
+
+    The hash covers everything the model depends on: the name and contents of each corpus file,
+     the tomb version, MODEL_FORMAT, and the analysis parameters, so a change to any of them
+     means a new entry (and the old one is garbage-collected, see _load_cached()).
+    """
+    h = hashlib.sha256(f"{__version__}\0{MODEL_FORMAT}\0{sorted(params.items())!r}\0".encode())
+    for path in corpus_files(lang):
+        h.update(os.path.basename(path).encode() + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                h.update(block)
+    return f"{kind}-{lang}-{h.hexdigest()[:16]}"
+
+
+def _load_cached(kind: str, lang: str, generate: Callable[[str], Any], **params: Any) -> Any:
+    name = model_cache_name(kind, lang, **params)
+
+    def regenerate() -> Any:
+        # Inputs have changed (or it's the first run), so any other entries of this kind are stale.
+        cache.prune(f"{kind}-{lang}", keep=name)
+        return generate(lang)
+
+    return cache.get_or_compute(name, regenerate)
+
+
+def generate_language_model(lang: str, processes: Optional[int] = None) -> LanguageModel:
+    return analyse_corpus(corpus_files(lang), processes=processes).compact().normalize()
+
+
+def generate_byte_language_model(lang: str, processes: Optional[int] = None) -> LanguageModel:
+    mdat = analyse_corpus(corpus_files(lang), binary=True, processes=processes)
+    return mdat.compact(b"abcdefghijklmnopqrstuvwxyz").normalize()
+
+
+def generate_quadgram_model(lang: str) -> QuadgramModel:
+    counts = Counter()
+
+    # Quadgrams are counted across word boundaries, as the fitness function strips everything but letters.
+    for text in corpus_texts(lang):
+        count_ngrams(re.sub("[^a-z]+", "", text.lower()), 4, counts)
+
+    return QuadgramModel.from_counts(counts)
+
+
+def model_file_path(lang: str, binary: bool = False) -> str:
+    """
+    Path of the prebuilt model file shipped in tomb.language.data (see tomb.language.build_models).
+    """
+    return str(resources.files(data) / (f"{lang}.bytes.model" if binary else f"{lang}.model"))
+
+
+# Cache entry kind, and n-gram alphabet, of the text (False) and byte (True) models.
+_kinds = {False: "language-model", True: "byte-language-model"}
+_alphabets = {False: "abcdefghijklmnopqrstuvwxyz", True: b"abcdefghijklmnopqrstuvwxyz"}
+
+
+def language_model_name(lang: str, binary: bool = False) -> str:
+    """
+    Cache entry name of the lang model (or the byte model), see model_cache_name().
+    """
+    return model_cache_name(_kinds[binary], lang, alphabet=_alphabets[binary])
+
+
+def model_source(name: str) -> str:
+    """
+    The hash part of a model_cache_name(), as recorded in model files.
+    """
+    return name.rsplit("-", 1)[1]
+
+
+def open_model_file(lang: str, binary: bool = False, name: Optional[str] = None) -> Optional[LanguageModel]:
+    """
+    Open the prebuilt model file for lang, if there is one, it's of the current MODEL_FORMAT,
+     and it was built from the current inputs (the corpus, analysis parameters and tomb version).
+     name is the language_model_name() of the model, if already known.
+    """
+    if name is None:
+        name = language_model_name(lang, binary)
+    try:
+        return open_model(model_file_path(lang, binary), MODEL_FORMAT, model_source(name))
+    except (OSError, ModelFileError):
+        return None
+
+
+def _updated_name(lang: str, binary: bool) -> str:
+    return f"updated-{_kinds[binary]}-{lang}"
+
+
+def _load_updated(lang: str, binary: bool, current: str) -> Optional[LanguageModel]:
+    # An updated model (see update_language_model()) is stored with the cache name of the model it was based on,
+    #  and only used as long as that is still current.
+    name = _updated_name(lang, binary)
+    if not cache.exists(name):
+        return None
     try:
-        lm = cache.unpickle(f"language-model-{lang}")
+        base, lm = cache.unpickle(name)
     except cache.CacheError:
-        lm = generate_language_model(lang)
-        cache.pickle(f"language-model-{lang}", lm)
+        return None
+    if base != current:
+        cache.invalidate(name)
+        return None
+    return lm
+
+
+def _load_language_model(lang: str, binary: bool) -> LanguageModel:
+    # The prebuilt model file is only used if it was built from the same inputs as the model would be now,
+    #  otherwise the model is generated (and cached) from the current corpus.
+    name = language_model_name(lang, binary)
+    lm = _load_updated(lang, binary, name)
+    if lm is None:
+        lm = open_model_file(lang, binary, name)
+    if lm is None:
+        generate = generate_byte_language_model if binary else generate_language_model
+        lm = _load_cached(_kinds[binary], lang, generate, alphabet=_alphabets[binary])
+    return lm
+
+
+def load_language_model(lang: str) -> LanguageModel:
+    return _load_language_model(lang, False)
+
+
+def load_byte_language_model(lang: str) -> LanguageModel:
+    return _load_language_model(lang, True)
+
+
+def update_language_model(
+    lang: str,
+    text_or_files: Union[str, bytes, os.PathLike, Iterable[Path]],
+    binary: bool = False,
+    processes: Optional[int] = None
+) -> LanguageModel:
+    """
+    Add text to the lang model (or the byte model, if binary), without regenerating it from the whole corpus.
+
+    text_or_files is either some text (str or bytes), or one corpus file as an os.PathLike (e.g. a pathlib.Path),
+     or an iterable of corpus file paths (str or os.PathLike, see analyse_corpus()).
+     A str on its own is always text, never a path: pass [path] or pathlib.Path(path) for a file.
+
+    The stored models keep the raw counts (a normalized table keeps them, with their total as the divisor,
+     see FreqTable.normalize()), so the new counts are simply added to a copy of them, and only the tables that changed are renormalized.
+     The updated model is cached, and returned by the loaders from then on, until the corpus itself changes,
+     or reset_language_model() is called.
+
+    Module globals (e.g. tables.english) are replaced, but anything derived from the old model
+     (e.g. models kept in tomb.analysis.language_models) is not.
+    """
+    if isinstance(text_or_files, (str, bytes, bytearray)):
+        text = text_or_files
+        if binary and isinstance(text, str):
+            text = text.encode("utf-8")
+        elif not binary and not isinstance(text, str):
+            text = bytes(text).decode("utf-8")
+        new = analyse_text(text.strip())
+    else:
+        if isinstance(text_or_files, os.PathLike):
+            text_or_files = [text_or_files]
+        new = analyse_corpus(text_or_files, binary=binary, processes=processes)
+
+    tabs = []
+    for tab, counts in zip(_load_language_model(lang, binary), new):
+        if counts:
+            tab = tab.copy()
+            tab.update(counts)
+            tab = tab.normalize()
+        tabs.append(tab)
+    lm = LanguageModel(*tabs)
+
+    base = language_model_name(lang, binary)
+    cache.pickle(_updated_name(lang, binary), (base, lm))
+
+    for name in _model_globals(lang, binary):
+        globals()[name] = lm
     return lm
 
 
-english = load_language_model("english")
+def reset_language_model(lang: str, binary: bool = False):
+    """
+    Discard any updates made to the lang model by update_language_model().
+    """
+    cache.invalidate(_updated_name(lang, binary))
+    # Reloaded on next access.
+    for name in _model_globals(lang, binary):
+        globals().pop(name, None)
+
+
+def load_quadgram_model(lang: str) -> QuadgramModel:
+    return _load_cached("quadgram-model", lang, generate_quadgram_model, n=4, floor=0.01)
+
+
+# Models are loaded on first access, not at import time: loading may mean analysing the whole corpus,
+#  and even a cache hit costs an unpickle, which is wasted on anything that doesn't score text.
+_models = {
+    "english": (load_language_model, "english"),
+    "english_bytes": (load_byte_language_model, "english"),
+    "english_quadgrams": (load_quadgram_model, "english"),
+}
+
+
+def _model_globals(lang: str, binary: bool) -> list[str]:
+    loader = load_byte_language_model if binary else load_language_model
+    return [name for name, model in _models.items() if model == (loader, lang)]
+
+
+def __getattr__(name: str):
+    try:
+        loader, lang = _models[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    # Once loaded, the model is an ordinary module global, so this is only called once per model.
+    model = globals()[name] = loader(lang)
+    return model
+
+
+def preload():
+    """
+    Load all the models now, rather than on first use (e.g. before a server starts taking requests,
+     or before forking worker processes, so they inherit the loaded models).
+    """
+    for name in _models:
+        getattr(sys.modules[__name__], name)